@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Parallel, cached ``auto_arima`` order selection for many KPI series.
+
+``model_building.py`` runs ``auto_arima(..., seasonal=True, m=7, stepwise=True)``
+on one series at a time. ``select_orders()`` runs the search for a whole batch of
+series across a process pool, caches the chosen ``(order, seasonal_order)`` per
+series fingerprint, and uses the last order found for a series name as the
+stepwise starting point when its data has changed. A series whose search fails
+gets ``DEFAULT_ORDER`` and an ``error`` entry in the report; the orders found for
+the other series are still cached.
+"""
+
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+CACHE_PATH = 'arima_order_cache.json'
+# The notebook's hand-picked ARIMA(1, 0, 0), without a seasonal part
+DEFAULT_ORDER = ((1, 0, 0), (0, 0, 0, 0))
+REPORT_COLUMNS = ['series', 'order', 'seasonal_order', 'seconds', 'cache_hit', 'warm_start', 'error']
+
+
+def series_fingerprint(series, search_params):
+    values = np.asarray(series, dtype=np.float64)
+    digest = hashlib.sha256(values.tobytes())
+    digest.update(json.dumps(search_params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _load_cache(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'orders': {}, 'latest': {}}
+
+
+def _save_cache(cache, path):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _search(name, values, search_params, warm_start):
+    # Runs in a worker process; pmdarima is imported there so the parent stays light
+    import warnings
+    from pmdarima import auto_arima
+
+    params = dict(search_params)
+    if warm_start is not None:
+        (p, _, q), (P, _, Q, _) = warm_start
+        params.update(start_p=p, start_q=q, start_P=P, start_Q=Q)
+
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model = auto_arima(values, suppress_warnings=True, error_action='ignore', **params)
+    return name, list(model.order), list(model.seasonal_order), time.perf_counter() - start
+
+
+def select_orders(series, seasonal=True, m=7, stepwise=True, n_jobs=None, cache_path=CACHE_PATH,
+                  search_fn=_search, default_order=DEFAULT_ORDER):
+    """Choose ARIMA orders for every series in ``series`` (a dict or a DataFrame of columns).
+
+    Returns ``(orders, report)``: ``orders`` maps each name to ``(order, seasonal_order)``
+    and ``report`` is a DataFrame with the search time, cache hit and warm-start flags
+    per series, plus the error of any search that failed (its series gets ``default_order``).
+    """
+    if isinstance(series, pd.DataFrame):
+        series = {column: series[column] for column in series.columns}
+    search_params = {'seasonal': seasonal, 'm': m, 'stepwise': stepwise}
+    cache = _load_cache(cache_path)
+
+    orders, rows, pending = {}, [], {}
+    for name, values in series.items():
+        values = pd.Series(values).dropna().to_numpy(dtype=np.float64)
+        fingerprint = series_fingerprint(values, search_params)
+        if fingerprint in cache['orders']:
+            order, seasonal_order = cache['orders'][fingerprint]
+            orders[name] = (tuple(order), tuple(seasonal_order))
+            rows.append({'series': name, 'order': orders[name][0], 'seasonal_order': orders[name][1],
+                         'seconds': 0.0, 'cache_hit': True, 'warm_start': False, 'error': None})
+        else:
+            pending[name] = (values, fingerprint, cache['latest'].get(str(name)))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = {name: pool.submit(search_fn, name, values, search_params, warm_start)
+                       for name, (values, _, warm_start) in pending.items()}
+            for name, future in futures.items():
+                _, fingerprint, warm_start = pending[name]
+                try:
+                    _, order, seasonal_order, seconds = future.result()
+                except Exception as exc:
+                    # One failed fit must not discard the other searches; nothing is cached for it
+                    orders[name] = default_order
+                    rows.append({'series': name, 'order': default_order[0], 'seasonal_order': default_order[1],
+                                 'seconds': np.nan, 'cache_hit': False, 'warm_start': warm_start is not None,
+                                 'error': f'{type(exc).__name__}: {exc}'})
+                    continue
+                cache['orders'][fingerprint] = [order, seasonal_order]
+                cache['latest'][str(name)] = [order, seasonal_order]
+                orders[name] = (tuple(order), tuple(seasonal_order))
+                rows.append({'series': name, 'order': orders[name][0], 'seasonal_order': orders[name][1],
+                             'seconds': seconds, 'cache_hit': False, 'warm_start': warm_start is not None,
+                             'error': None})
+        if cache_path:
+            _save_cache(cache, cache_path)
+
+    report = pd.DataFrame(rows, columns=REPORT_COLUMNS)
+    return orders, report
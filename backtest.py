@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Rolling-origin backtesting for the ARIMA, SARIMA and Prophet forecasters.
+
+``model_building.py`` scores each model on a single 80/20 split. ``backtest()``
+evaluates every model family over many cutoffs instead. The statsmodels
+state-space models are fitted once and then moved forward with
+``results.append(..., refit=False)``, which extends the Kalman filter with the new
+observations while keeping the estimated parameters; Prophet has no such update
+and is refitted per cutoff, with cutoffs spread over a process pool.
+"""
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+BacktestResult = namedtuple('BacktestResult', ['predictions', 'by_cutoff', 'by_horizon', 'timing'])
+
+DEFAULT_MODELS = {
+    'arima': {'order': (1, 0, 0)},
+    'sarima': {'order': (1, 0, 0), 'seasonal_order': (1, 0, 0, 7)},
+    'prophet': {'seasonality_mode': 'multiplicative'},
+}
+
+
+def _rows(model, index, values, cutoff, forecast):
+    steps = len(forecast)
+    return [{
+        'model': model,
+        'cutoff': index[cutoff - 1],
+        'horizon': h + 1,
+        'ds': index[cutoff + h],
+        'y_true': values[cutoff + h],
+        'y_pred': float(forecast[h]),
+    } for h in range(steps)]
+
+
+def _statespace_folds(model, params, index, values, cutoffs, horizon, refit_every):
+    import warnings
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    from statsmodels.tsa.arima.model import ARIMA
+
+    start = time.perf_counter()
+    rows = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        build = (lambda y: ARIMA(y, **params)) if model == 'arima' else (lambda y: SARIMAX(y, **params))
+        results = build(values[:cutoffs[0]]).fit()
+        seen = cutoffs[0]
+        for fold, cutoff in enumerate(cutoffs):
+            if cutoff > seen:
+                refit = bool(refit_every) and fold % refit_every == 0
+                results = results.append(values[seen:cutoff], refit=refit)
+                seen = cutoff
+            steps = min(horizon, len(values) - cutoff)
+            rows += _rows(model, index, values, cutoff, np.asarray(results.forecast(steps=steps)))
+    return rows, time.perf_counter() - start
+
+
+def _prophet_folds(params, index, values, cutoffs, horizon):
+    import logging
+    from prophet import Prophet
+
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    start = time.perf_counter()
+    rows = []
+    for cutoff in cutoffs:
+        steps = min(horizon, len(values) - cutoff)
+        model = Prophet(**params)
+        model.fit(pd.DataFrame({'ds': index[:cutoff], 'y': values[:cutoff]}))
+        forecast = model.predict(pd.DataFrame({'ds': index[cutoff:cutoff + steps]}))
+        rows += _rows('prophet', index, values, cutoff, forecast['yhat'].to_numpy())
+    return rows, time.perf_counter() - start
+
+
+def _metrics(group):
+    error = group['y_true'] - group['y_pred']
+    ss_tot = ((group['y_true'] - group['y_true'].mean()) ** 2).sum()
+    return pd.Series({
+        'RMSE': np.sqrt((error ** 2).mean()),
+        'MAE': error.abs().mean(),
+        'R2': 1 - (error ** 2).sum() / ss_tot if len(group) > 1 and ss_tot > 0 else np.nan,
+        'n': len(group),
+    })
+
+
+def _summarise(predictions, key):
+    grouped = predictions.groupby(['model', key])
+    return grouped[['y_true', 'y_pred']].apply(_metrics).reset_index()
+
+
+def backtest(series, models=None, initial=None, step=1, horizon=7, refit_every=None, n_jobs=None):
+    """Rolling-origin evaluation of ``series`` (a Series with a DatetimeIndex).
+
+    ``models`` maps ``'arima'`` / ``'sarima'`` / ``'prophet'`` to constructor keyword
+    arguments; the first cutoff trains on ``initial`` observations (default half the
+    series) and each later cutoff adds ``step`` more. ``refit_every=k`` re-estimates
+    the state-space parameters every ``k`` folds instead of only filtering.
+    """
+    models = DEFAULT_MODELS if models is None else models
+    series = series.dropna()
+    index, values = series.index, series.to_numpy(dtype=np.float64)
+    initial = len(values) // 2 if initial is None else initial
+    cutoffs = list(range(initial, len(values), step))
+    if not cutoffs:
+        raise ValueError("Series is too short for the requested initial window")
+
+    workers = n_jobs or os.cpu_count() or 1
+    tasks = []
+    finished = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(model, fn, *args):
+            future = pool.submit(fn, *args)
+            future.add_done_callback(lambda f: finished.__setitem__(f, time.perf_counter()))
+            tasks.append((model, future))
+
+        for model, params in models.items():
+            if model in ('arima', 'sarima'):
+                submit(model, _statespace_folds, model, params, index, values, cutoffs, horizon, refit_every)
+            elif model == 'prophet':
+                # Independent fits, so spread the cutoffs over the pool
+                for chunk in np.array_split(np.asarray(cutoffs), workers):
+                    if len(chunk):
+                        submit(model, _prophet_folds, params, index, values, chunk.tolist(), horizon)
+            else:
+                raise ValueError(f"Unknown model family: {model!r}")
+
+        rows, worker_seconds = [], {}
+        for model, future in tasks:
+            model_rows, elapsed = future.result()
+            rows += model_rows
+            worker_seconds[model] = worker_seconds.get(model, 0.0) + elapsed
+
+    # Wall clock until a model's last task finished; worker_seconds sums its tasks over the workers
+    wall_seconds = {}
+    for model, future in tasks:
+        wall_seconds[model] = max(wall_seconds.get(model, 0.0), finished[future] - start)
+    predictions = pd.DataFrame(rows)
+    timing = pd.DataFrame({'model': list(worker_seconds), 'wall_seconds': [wall_seconds[m] for m in worker_seconds],
+                           'worker_seconds': list(worker_seconds.values())})
+    timing['folds'] = len(cutoffs)
+    return BacktestResult(predictions, _summarise(predictions, 'cutoff'), _summarise(predictions, 'horizon'), timing)
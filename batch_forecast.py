@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Vectorized forecasting for many series at once.
+
+``model_building.py`` and the dashboard fit one statsmodels ``ARIMA``/``SARIMAX``
+or one Prophet model per series, which costs tens of milliseconds of Python
+overhead per fit. With one success-rate series per service, region or payment
+channel that adds up to minutes. The models here work on a 2-D array with one
+row per series and fit every row in the same NumPy operations:
+
+- ``ar``: AR(p) with intercept. Least squares is solved per series as a batched
+  ``(p+1) x (p+1)`` system, and intervals come from the MA(infinity) weights.
+- ``seasonal_naive``: repeats the last season. Intervals come from the
+  seasonal-difference residuals.
+- ``holt_winters``: additive Holt-Winters. Only when no season is given does
+  it fall back to Holt's linear trend method. A small parameter grid is run
+  for all series together and each series keeps its lowest in-sample SSE.
+  Intervals use the ETS(A,A,A) variance formula, or ETS(A,A,N) without a
+  season.
+
+``forecast()`` returns point forecasts and ``level`` prediction intervals for
+all series in one call. ``benchmark()`` compares against per-series statsmodels.
+"""
+
+import time
+import itertools
+from collections import namedtuple
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+Forecast = namedtuple('Forecast', ['mean', 'lower', 'upper', 'sigma', 'params'])
+
+HW_GRID = {
+    'alpha': [0.1, 0.3, 0.6],
+    'beta': [0.01, 0.1],
+    'gamma': [0.05, 0.3],
+}
+
+
+def fill_gaps(Y):
+    """Forward-fill NaNs along each row; leading NaNs take the row's first observed value."""
+    Y = np.array(Y, dtype=np.float64)
+    observed = ~np.isnan(Y)
+    idx = np.maximum.accumulate(np.where(observed, np.arange(Y.shape[1]), -1), axis=1)
+    idx = np.where(idx < 0, observed.argmax(axis=1)[:, None], idx)
+    return Y[np.arange(len(Y))[:, None], idx]
+
+
+def from_frame(df, value_column, series_column='service', time_column='interval', freq='5min'):
+    """Pivot a long frame into ``(Y, series_ids, index)`` on a regular time grid."""
+    wide = df.pivot_table(index=time_column, columns=series_column, values=value_column, aggfunc='mean')
+    wide = wide.asfreq(freq)
+    return wide.to_numpy(dtype=np.float64).T, wide.columns.to_numpy(), wide.index
+
+
+def z_score(level):
+    """Two-sided standard normal quantile for a ``level`` prediction interval."""
+    return NormalDist().inv_cdf(0.5 + level / 2)
+
+
+def _interval(mean, variance, level, params):
+    sigma = np.sqrt(variance)
+    z = z_score(level)
+    return Forecast(mean, mean - z * sigma, mean + z * sigma, sigma, params)
+
+
+def fit_ar(Y, p=2, ridge=1e-8):
+    """Batched least-squares AR(p); returns ``(coef, sigma2)`` with ``coef[:, 0]`` the intercept."""
+    n, T = Y.shape
+    windows = np.lib.stride_tricks.sliding_window_view(Y, p + 1, axis=1)   # (n, T-p, p+1)
+    target = windows[:, :, -1]
+    X = np.concatenate([np.ones((n, T - p, 1)), windows[:, :, -2::-1]], axis=2)   # [1, y[t-1], ..., y[t-p]]
+    XtX = np.einsum('ntk,ntj->nkj', X, X) + ridge * np.eye(p + 1)
+    Xty = np.einsum('ntk,nt->nk', X, target)
+    coef = np.linalg.solve(XtX, Xty[..., None])[..., 0]
+    residuals = target - np.einsum('ntk,nk->nt', X, coef)
+    sigma2 = (residuals ** 2).sum(axis=1) / max(T - p - (p + 1), 1)
+    return coef, sigma2
+
+
+def ma_weights(phi, h):
+    """First ``h`` MA(infinity) weights of AR coefficients ``phi`` (one row per series)."""
+    # psi_0 = 1, psi_k = sum_j phi_j psi_{k-j}
+    p = phi.shape[1]
+    psi = np.zeros((len(phi), h))
+    psi[:, 0] = 1.0
+    for k in range(1, h):
+        lags = min(k, p)
+        psi[:, k] = (phi[:, :lags] * psi[:, k - 1::-1][:, :lags]).sum(axis=1)
+    return psi
+
+
+def ar_forecast(Y, h, p=2, level=0.95):
+    coef, sigma2 = fit_ar(Y, p)
+    intercept, phi = coef[:, 0], coef[:, 1:]
+    history = Y[:, -p:][:, ::-1].copy()      # most recent first
+    mean = np.empty((len(Y), h))
+    for k in range(h):
+        mean[:, k] = intercept + (phi * history).sum(axis=1)
+        history = np.concatenate([mean[:, k:k + 1], history[:, :-1]], axis=1)
+
+    variance = sigma2[:, None] * np.cumsum(ma_weights(phi, h) ** 2, axis=1)
+    return _interval(mean, variance, level, {'coef': coef, 'sigma2': sigma2})
+
+
+def seasonal_naive_forecast(Y, h, season, level=0.95):
+    T = Y.shape[1]
+    steps = np.arange(h)
+    mean = Y[:, T - season + steps % season]
+    residuals = Y[:, season:] - Y[:, :-season]
+    sigma2 = np.mean(residuals ** 2, axis=1)
+    variance = sigma2[:, None] * (steps // season + 1)
+    return _interval(mean, variance, level, {'sigma2': sigma2})
+
+
+def _holt_winters_pass(Y, season, alpha, beta, gamma):
+    n, T = Y.shape
+    m = season or 1
+    if season and T >= 2 * m:
+        level = Y[:, :m].mean(axis=1)
+        trend = (Y[:, m:2 * m].mean(axis=1) - level) / m
+        seasonal = Y[:, :m] - level[:, None]
+    else:
+        level, trend = Y[:, 0].copy(), np.zeros(n)
+        seasonal = np.zeros((n, m))
+    sse = np.zeros(n)
+    for t in range(T):
+        s = seasonal[:, t % m]
+        error = Y[:, t] - (level + trend + s)
+        sse += error ** 2
+        new_level = alpha * (Y[:, t] - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+        if season:
+            seasonal[:, t % m] = gamma * (Y[:, t] - level) + (1 - gamma) * s
+    return sse, level, trend, seasonal
+
+
+def holt_winters_forecast(Y, h, season=None, level=0.95, grid=None):
+    grid = grid or HW_GRID
+    n, T = Y.shape
+    gammas = grid['gamma'] if season else [0.0]
+    best = None
+    for alpha, beta, gamma in itertools.product(grid['alpha'], grid['beta'], gammas):
+        sse, lvl, trend, seasonal = _holt_winters_pass(Y, season, alpha, beta, gamma)
+        params = np.array([alpha, beta, gamma])
+        if best is None:
+            best = [sse, lvl, trend, seasonal, np.tile(params, (n, 1))]
+            continue
+        better = sse < best[0]
+        best[0] = np.where(better, sse, best[0])
+        best[1] = np.where(better, lvl, best[1])
+        best[2] = np.where(better, trend, best[2])
+        best[3] = np.where(better[:, None], seasonal, best[3])
+        best[4] = np.where(better[:, None], params, best[4])
+    sse, lvl, trend, seasonal, params = best
+
+    m = season or 1
+    steps = np.arange(1, h + 1)
+    mean = lvl[:, None] + steps * trend[:, None] + seasonal[:, (T + steps - 1) % m]
+    alpha, beta, gamma = params[:, 0:1], params[:, 1:2], params[:, 2:3]
+    # ETS(A,A,A) h-step variance: sigma2 * (1 + sum_{j<h} c_j^2), c_j = alpha(1 + j beta) + gamma(1 - alpha) [j % m == 0]
+    j = steps[None, :-1] if h > 1 else np.zeros((1, 0))
+    c = alpha * (1 + j * beta) + (gamma * (1 - alpha) * (j % m == 0) if season else 0)
+    sigma2 = sse / max(T - 3, 1)
+    variance = sigma2[:, None] * (1 + np.concatenate([np.zeros((n, 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+    return _interval(mean, variance, level, {'alpha': params[:, 0], 'beta': params[:, 1], 'gamma': params[:, 2],
+                                             'sigma2': sigma2})
+
+
+def forecast(Y, h, method='holt_winters', season=None, level=0.95, p=2, grid=None):
+    """Forecast ``h`` steps for every row of the ``(series, time)`` array ``Y``."""
+    Y = fill_gaps(np.atleast_2d(Y))
+    season = season if season and season > 1 else None
+    if method == 'ar':
+        return ar_forecast(Y, h, p, level)
+    if method == 'seasonal_naive':
+        if not season:
+            raise ValueError("seasonal_naive needs a season length")
+        return seasonal_naive_forecast(Y, h, season, level)
+    if method == 'holt_winters':
+        return holt_winters_forecast(Y, h, season, level, grid)
+    raise ValueError(f"Unknown method: {method!r}")
+
+
+def _synthetic(n_series, length, season, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    level = rng.uniform(85, 98, (n_series, 1))
+    trend = rng.normal(0, 0.02, (n_series, 1)) * t
+    seasonal = rng.uniform(0.5, 3, (n_series, 1)) * np.sin(2 * np.pi * t / season + rng.uniform(0, 2 * np.pi, (n_series, 1)))
+    noise = np.zeros((n_series, length))
+    shocks = rng.normal(0, 1, (n_series, length))
+    for i in range(1, length):
+        noise[:, i] = 0.5 * noise[:, i - 1] + shocks[:, i]
+    return level + trend + seasonal + noise
+
+
+def benchmark(n_series=2000, length=120, horizon=14, season=7, n_reference=20, p=2, seed=0):
+    """Wall time and holdout MAE of the batched models against per-series statsmodels fits.
+
+    Per-series times are measured on ``n_reference`` series and scaled to ``n_series``.
+    """
+    import warnings
+    from statsmodels.tsa.ar_model import AutoReg
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    Y = _synthetic(n_series, length + horizon, season, seed)
+    train, test = Y[:, :length], Y[:, length:]
+    rows = []
+    for method, kwargs in [('ar', {'p': p}), ('seasonal_naive', {'season': season}),
+                           ('holt_winters', {'season': season})]:
+        start = time.perf_counter()
+        result = forecast(train, horizon, method, **kwargs)
+        seconds = time.perf_counter() - start
+        covered = np.mean((test >= result.lower) & (test <= result.upper))
+        rows.append({'engine': 'batched', 'method': method, 'seconds': seconds,
+                     'mae': np.mean(np.abs(test - result.mean)), 'coverage_95': covered})
+
+    reference = np.arange(min(n_reference, n_series))
+    scale = n_series / len(reference)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for method, fit in [
+            ('ar', lambda y: AutoReg(y, lags=p).fit().forecast(horizon)),
+            ('holt_winters', lambda y: ExponentialSmoothing(y, trend='add', seasonal='add',
+                                                            seasonal_periods=season).fit().forecast(horizon)),
+        ]:
+            start = time.perf_counter()
+            predictions = np.array([fit(train[i]) for i in reference])
+            seconds = (time.perf_counter() - start) * scale
+            rows.append({'engine': 'statsmodels', 'method': method, 'seconds': seconds,
+                         'mae': np.mean(np.abs(test[reference] - predictions)), 'coverage_95': np.nan})
+    report = pd.DataFrame(rows)
+    report['series'] = n_series
+    return report
+
+
+if __name__ == '__main__':
+    print(benchmark().to_string(index=False))
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Offline benchmark of every pipeline stage at several data scales.
+
+Each stage from ``pipeline_stages`` runs on synthetic data at 1x, 10x and 100x the
+notebook's 30-day dataset (scaling the number of days). For every (stage, scale)
+pair the wall time, peak RSS and rows/sec are recorded and written to JSON, and
+two result files can be compared to spot regressions between commits:
+
+    python benchmark_pipeline.py --scales 1 10 --output bench_HEAD.json
+    python benchmark_pipeline.py --compare bench_main.json bench_HEAD.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import threading
+import subprocess
+from datetime import datetime, timezone
+import pipeline_stages as stages
+
+BASE_DAYS = 30
+STAGES = ['generate', 'clean', 'align', 'features', 'aggregate', 'train', 'forecast', 'explain']
+
+
+class PeakRSS:
+    """Samples this process's resident set size in a background thread."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except OSError:
+            # No procfs: fall back to the process-wide high-water mark (KiB on Linux, bytes on macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == 'darwin' else peak * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def _inputs(scale, seed=42):
+    """Outputs of every stage at ``scale``, computed once so each stage is timed on its own."""
+    data = {}
+    data['business_kpi_df'], data['interval_kpi_df'], data['it_metrics_df'] = stages.generate_data(BASE_DAYS * scale, seed=seed)
+    data['business_clean'] = stages.clean_business_kpi(data['business_kpi_df'])
+    data['it_clean'] = stages.clean_it_metrics(data['it_metrics_df'])
+    data['aligned_df'] = stages.align_datasets(data['interval_kpi_df'], data['it_clean'])
+    data['features_df'] = stages.engineer_features(data['aligned_df'])
+    data['daily_df'] = stages.daily_aggregates(data['features_df'])
+    return data
+
+
+def _stage(name, data, scale):
+    # Returns (callable, number of input rows) for one stage
+    if name == 'generate':
+        return (lambda: stages.generate_data(BASE_DAYS * scale)), len(data['business_kpi_df']) + len(data['it_metrics_df'])
+    if name == 'clean':
+        return (lambda: (stages.clean_business_kpi(data['business_kpi_df']),
+                         stages.clean_it_metrics(data['it_metrics_df']))), len(data['business_kpi_df']) + len(data['it_metrics_df'])
+    if name == 'align':
+        return (lambda: stages.align_datasets(data['interval_kpi_df'], data['it_clean'])), len(data['it_clean'])
+    if name == 'features':
+        return (lambda: stages.engineer_features(data['aligned_df'])), len(data['aligned_df'])
+    if name == 'aggregate':
+        return (lambda: stages.daily_aggregates(data['features_df'])), len(data['features_df'])
+    if name == 'train':
+        return (lambda: stages.train_degradation_model(data['features_df'])), len(data['features_df'])
+    if name == 'forecast':
+        return (lambda: stages.fit_arima(data['daily_df'])), len(data['daily_df'])
+    if name == 'explain':
+        if 'model' not in data:
+            data['model'] = stages.train_degradation_model(data['features_df'])[0]
+        return (lambda: stages.explain(data['model'], data['features_df'])), len(data['features_df'])
+    raise ValueError(f"Unknown stage: {name!r}")
+
+
+def run_stage(name, scale, data=None):
+    data = _inputs(scale) if data is None else data
+    fn, rows = _stage(name, data, scale)
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+    return {
+        'stage': name,
+        'scale': scale,
+        'rows': rows,
+        'seconds': seconds,
+        'peak_rss_mb': rss.peak / 2 ** 20,
+        'rss_growth_mb': (rss.peak - rss.start) / 2 ** 20,
+        'rows_per_sec': rows / seconds if seconds > 0 else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(scales=(1, 10, 100), stage_names=STAGES):
+    results = []
+    for scale in scales:
+        data = _inputs(scale)
+        for name in stage_names:
+            result = run_stage(name, scale, data)
+            print(f"{name:>10} x{scale:<4} {result['seconds']:9.3f}s  {result['peak_rss_mb']:9.1f} MB  "
+                  f"{result['rows_per_sec'] or 0:12.0f} rows/s")
+            results.append(result)
+    return {
+        'commit': _git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=1.2):
+    """Rows of (stage, scale, metric, baseline, current, ratio) where ``current`` is worse by ``threshold``."""
+    base = {(r['stage'], r['scale']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        previous = base.get((result['stage'], result['scale']))
+        if previous is None:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            if previous[metric] and result[metric] / previous[metric] > threshold:
+                regressions.append((result['stage'], result['scale'], metric, previous[metric], result[metric],
+                                    result[metric] / previous[metric]))
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark pipeline stages at several data scales.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'))
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for stage, scale, metric, before, after, ratio in regressions:
+            print(f"REGRESSION {stage} x{scale} {metric}: {before:.3f} -> {after:.3f} ({ratio:.2f}x)")
+        sys.exit(1 if regressions else 0)
+
+    report = run_benchmarks(args.scales, args.stages)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Server-side query layer for dashboard charts.
+
+Charts ask for a time range and a target number of points instead of receiving
+whole frames. Data is read from the feature store with column projection and
+time-range pushdown, then reduced with a shape-preserving downsampler:
+
+- ``lttb``: Largest-Triangle-Three-Buckets, keeps the visually significant points;
+- ``minmax``: the minimum and maximum of every bucket, keeps spikes exactly.
+
+``latest_values()`` answers "current value" widgets from the newest partitions
+only, and ``column_means()`` reads just the columns it averages.
+"""
+
+import numpy as np
+import pandas as pd
+from feature_store import read_table, partitions, table_spec
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, points):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets."""
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x, y = _as_float(x), np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(y, points):
+    """Indices of each bucket's minimum and maximum (``points // 2`` buckets), in time order."""
+    n = len(y)
+    if points >= n or points < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = max(points // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    width = np.diff(edges).max()
+    # Pad buckets to equal width so argmin/argmax run on a single 2-D array
+    padded = np.full((buckets, width), np.nan)
+    offsets = np.arange(width)
+    positions = edges[:-1, None] + offsets
+    valid = positions < edges[1:, None]
+    padded[valid] = y[positions[valid]]
+    filled = np.where(np.isnan(padded), np.inf, padded)
+    mins = edges[:-1] + np.argmin(filled, axis=1)
+    filled = np.where(np.isnan(padded), -np.inf, padded)
+    maxs = edges[:-1] + np.argmax(filled, axis=1)
+    return np.unique(np.concatenate([mins, maxs]))
+
+
+def downsample(df, x, y, points=1000, method='lttb'):
+    """Reduce ``df`` to about ``points`` rows, chosen on column ``y`` against ``x``."""
+    df = df.dropna(subset=[y])
+    if len(df) <= points:
+        return df.reset_index(drop=True)
+    if method == 'lttb':
+        indices = lttb_indices(df[x].to_numpy(), df[y].to_numpy(), points)
+    elif method == 'minmax':
+        indices = minmax_indices(df[y].to_numpy(), points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method!r}")
+    return df.iloc[indices].reset_index(drop=True)
+
+
+def query_series(name, column, start=None, end=None, points=1000, method='lttb', root='feature_store'):
+    """``[time, column]`` frame for ``start <= time < end`` with at most ~``points`` rows."""
+    _, time_column, _ = table_spec(name)
+    df = read_table(name, columns=[time_column, column], start=start, end=end, root=root)
+    return downsample(df, time_column, column, points, method)
+
+
+def latest_values(name, columns, root='feature_store'):
+    """Latest non-missing value of each of ``columns`` (NaN if it has none).
+
+    Partitions are read newest first, and older ones only for columns that are
+    still missing, so the usual case touches a single partition.
+    """
+    _, time_column, _ = table_spec(name)
+    columns = list(columns)
+    latest = pd.Series(np.nan, index=columns, dtype=float)
+    for partition in reversed(partitions(name, root)):
+        missing = [c for c in columns if np.isnan(latest[c])]
+        if not missing:
+            break
+        df = read_table(name, columns=[time_column] + missing, start=pd.Timestamp(partition), root=root)
+        for column in missing:
+            values = df[column].dropna()
+            if not values.empty:
+                latest[column] = values.iloc[-1]
+    return latest
+
+
+def column_means(name, columns, start=None, end=None, root='feature_store'):
+    """Mean of each of ``columns`` over the rows of ``name``, reading only those columns."""
+    return read_table(name, columns=list(columns), start=start, end=end, root=root).mean()
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""Headless command-line entry points for the pipeline.
+
+    python cli.py generate --days 30
+    python cli.py features
+    python cli.py train
+    python cli.py tune --model xgboost
+    python cli.py forecast --model prophet --periods 30
+    python cli.py intraday --steps 12
+    python cli.py explain --by hour
+
+Only argparse is imported at startup; pandas, statsmodels, Prophet, XGBoost,
+SHAP and matplotlib are imported inside the subcommand that needs them. Plots are
+never shown interactively: pass ``--plot-dir`` to write them as PNG files.
+"""
+
+import os
+import sys
+import argparse
+
+
+def _save_plot(plot_dir, name, draw):
+    """Render ``draw(ax)`` with the non-interactive Agg backend into ``plot_dir/name.png``."""
+    if not plot_dir:
+        return None
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    os.makedirs(plot_dir, exist_ok=True)
+    fig, ax = plt.subplots(figsize=(12, 6))
+    draw(ax)
+    fig.tight_layout()
+    path = os.path.join(plot_dir, f'{name}.png')
+    fig.savefig(path)
+    plt.close(fig)
+    return path
+
+
+def cmd_generate(args):
+    from synthetic_data import write_synthetic_dataset
+
+    business_rows, it_rows = write_synthetic_dataset(
+        args.data_dir, args.days, args.tx_per_interval, args.services, args.missing_ratio,
+        args.status_missing_ratio, args.duplicate_ratio, seed=args.seed)
+    print(f"Business KPI rows: {business_rows}, IT metric rows: {it_rows}")
+
+
+def cmd_features(args):
+    import pandas as pd
+    import pipeline_stages as stages
+    from interval_kpi import interval_kpis
+    from feature_store import write_table
+    from schema import coerce, read_csv
+
+    business_kpi_df = read_csv(os.path.join(args.data_dir, 'raw_business_kpi_data.csv'))
+    it_metrics_df = read_csv(os.path.join(args.data_dir, 'raw_it_metrics_data.csv'))
+
+    interval_kpi_df = interval_kpis(business_kpi_df)
+    it_metrics_df = stages.clean_it_metrics(it_metrics_df)
+    aligned_df = stages.align_datasets(interval_kpi_df, it_metrics_df)
+    features_df = coerce(stages.engineer_features(aligned_df))
+    daily_df = coerce(stages.daily_aggregates(features_df))
+
+    features_df.to_csv(os.path.join(args.data_dir, 'final_feature_engineered_data.csv'), index=False)
+    daily_df.to_csv(os.path.join(args.data_dir, 'daily_aggregated_features.csv'), index=False)
+    write_table(features_df, 'features', root=args.store_root)
+    write_table(daily_df, 'daily', root=args.store_root)
+    print(f"Feature rows: {len(features_df)}, daily rows: {len(daily_df)}")
+
+    _save_plot(args.plot_dir, 'daily_success_rate', lambda ax: (
+        ax.plot(pd.to_datetime(daily_df['date']), daily_df['transaction_success_rate']),
+        ax.set_title('Transaction Success Rate Over Time')))
+
+
+def cmd_train(args):
+    import pipeline_stages as stages
+    from feature_store import read_table
+    from model_store import save_model
+
+    features_df = read_table('features', columns=['interval', 'timestamp', 'transaction_success_rate']
+                             + stages.CLASSIFIER_FEATURES, root=args.store_root)
+    model, metrics = stages.train_degradation_model(features_df, random_state=args.seed,
+                                                    imbalance=args.imbalance)
+    version = save_model(model, args.model_name, features=stages.CLASSIFIER_FEATURES,
+                         training_data=features_df[stages.CLASSIFIER_FEATURES], metrics=metrics,
+                         root=args.model_root)
+    print(f"Model '{args.model_name}' version {version} saved: {metrics}")
+
+
+def cmd_tune(args):
+    import pipeline_stages as stages
+    from feature_store import read_table
+    from hyperparameter_search import search_degradation_model
+
+    features_df = read_table('features', columns=['interval', 'timestamp', 'transaction_success_rate']
+                             + stages.CLASSIFIER_FEATURES, root=args.store_root)
+    result = search_degradation_model(features_df, model=args.model, n_candidates=args.candidates,
+                                      n_splits=args.splits, n_jobs=args.jobs, random_state=args.seed)
+    print(result.trials.sort_values('score', ascending=False).head(10).to_string(index=False))
+    print(f"Best {args.model} params: {result.best_params}")
+    print(f"Best AUC: {result.best_score:.4f}, found after {result.time_to_best:.1f}s "
+          f"(search took {result.total_seconds:.1f}s)")
+
+
+def cmd_forecast(args):
+    import pandas as pd
+    from feature_store import read_table
+
+    daily_df = read_table('daily', columns=['date', args.kpi], root=args.store_root)
+    series = daily_df.set_index('date')[args.kpi].asfreq('D').ffill()
+
+    if args.model == 'prophet':
+        from forecast_cache import cached_prophet_forecast
+        prophet_df = series.reset_index().rename(columns={'date': 'ds', args.kpi: 'y'})
+        forecast = cached_prophet_forecast(prophet_df, periods=args.periods)
+        forecast = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(args.periods)
+    elif args.model in ('holt_winters', 'ar', 'seasonal_naive'):
+        from batch_forecast import forecast as batch_forecast
+        result = batch_forecast(series.to_numpy()[None, :], args.periods, args.model, season=args.season)
+        forecast = pd.DataFrame({'ds': pd.date_range(series.index[-1], periods=args.periods + 1, freq='D')[1:],
+                                 'yhat': result.mean[0], 'yhat_lower': result.lower[0], 'yhat_upper': result.upper[0]})
+    else:
+        from statsmodels.tsa.arima.model import ARIMA
+        prediction = ARIMA(series, order=tuple(args.order)).fit().get_forecast(steps=args.periods)
+        interval = prediction.conf_int()
+        forecast = pd.DataFrame({'ds': prediction.predicted_mean.index, 'yhat': prediction.predicted_mean.to_numpy(),
+                                 'yhat_lower': interval.iloc[:, 0].to_numpy(), 'yhat_upper': interval.iloc[:, 1].to_numpy()})
+
+    forecast.to_csv(args.output, index=False)
+    print(f"{args.model} forecast for {args.periods} days written to {args.output}")
+
+    def draw(ax):
+        ax.plot(series.index, series.to_numpy(), label='Actual')
+        ax.plot(forecast['ds'], forecast['yhat'], label='Forecast')
+        ax.fill_between(forecast['ds'], forecast['yhat_lower'], forecast['yhat_upper'], alpha=0.15)
+        ax.set_title(f'{args.model} forecast of {args.kpi}')
+        ax.legend()
+    _save_plot(args.plot_dir, f'{args.model}_forecast', draw)
+
+
+def cmd_intraday(args):
+    from feature_store import read_table
+    from intraday_forecast import IntradayForecaster, TARGETS, INTERVALS_PER_DAY
+
+    window = args.window_days * INTERVALS_PER_DAY
+    df = read_table('features', columns=['interval'] + TARGETS, root=args.store_root)
+    model = IntradayForecaster(lags=args.lags, window=window).fit(df)
+    forecast = model.forecast(args.steps)
+    forecast.to_csv(args.output)
+    print(f"Intra-day forecast for {args.steps} intervals written to {args.output}")
+
+    def draw(ax):
+        recent = df.set_index('interval')[args.kpi].iloc[-INTERVALS_PER_DAY:]
+        ax.plot(recent.index, recent.to_numpy(), label='Actual')
+        ax.plot(forecast.index, forecast[args.kpi], label='Forecast')
+        ax.fill_between(forecast.index, forecast[f'{args.kpi}_lower'], forecast[f'{args.kpi}_upper'], alpha=0.15)
+        ax.set_title(f'Intra-day forecast of {args.kpi}')
+        ax.legend()
+    _save_plot(args.plot_dir, 'intraday_forecast', draw)
+
+
+def cmd_explain(args):
+    from feature_store import read_table
+    from model_store import load_model
+    from shap_store import ShapStore, store_key
+
+    model, metadata = load_model(args.model_name, args.version, root=args.model_root)
+    features = metadata['features']
+    df = read_table('features', columns=['interval'] + features, start=args.start, end=args.end,
+                    root=args.store_root).dropna(subset=features)
+    store = ShapStore(features, store_key(args.model_name, metadata['version']), root=args.shap_root)
+    added = store.update(model, df)
+    importance = store.importance(by=args.by, start=args.start, end=args.end)
+    print(f"Explained {added} new intervals")
+    print(importance.to_string())
+
+    if args.by is None:
+        _save_plot(args.plot_dir, 'shap_importance', lambda ax: (
+            ax.barh(importance['Feature'], importance['SHAP Importance']),
+            ax.set_title('Mean |SHAP| per feature')))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='KPI prediction and explainability pipeline.')
+    parser.add_argument('--data-dir', default='.')
+    parser.add_argument('--store-root', default='feature_store')
+    parser.add_argument('--model-root', default='model_store')
+    parser.add_argument('--plot-dir', default=None, help='write plots as PNG files to this directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser('generate', help='generate synthetic raw data')
+    generate.add_argument('--days', type=int, default=30)
+    generate.add_argument('--tx-per-interval', type=int, default=20)
+    generate.add_argument('--services', type=int, default=1)
+    generate.add_argument('--missing-ratio', type=float, default=0.5)
+    generate.add_argument('--status-missing-ratio', type=float, default=0.02)
+    generate.add_argument('--duplicate-ratio', type=float, default=0.01)
+    generate.add_argument('--seed', type=int, default=42)
+    generate.set_defaults(func=cmd_generate)
+
+    features = subparsers.add_parser('features', help='clean, align and feature-engineer raw data')
+    features.set_defaults(func=cmd_features)
+
+    train = subparsers.add_parser('train', help='train the degradation classifier')
+    train.add_argument('--model-name', default='kpi_degradation')
+    train.add_argument('--seed', type=int, default=42)
+    train.add_argument('--imbalance', choices=['none', 'class_weight', 'undersample', 'smote'], default='none',
+                       help='class-imbalance handling applied to the training split')
+    train.set_defaults(func=cmd_train)
+
+    tune = subparsers.add_parser('tune', help='time-ordered hyperparameter search with successive halving')
+    tune.add_argument('--model', choices=['xgboost', 'rf'], default='xgboost')
+    tune.add_argument('--candidates', type=int, default=27)
+    tune.add_argument('--splits', type=int, default=5)
+    tune.add_argument('--jobs', type=int, default=None)
+    tune.add_argument('--seed', type=int, default=42)
+    tune.set_defaults(func=cmd_tune)
+
+    forecast = subparsers.add_parser('forecast', help='forecast a daily KPI')
+    forecast.add_argument('--model', choices=['prophet', 'arima', 'holt_winters', 'ar', 'seasonal_naive'],
+                          default='prophet')
+    forecast.add_argument('--kpi', default='transaction_success_rate')
+    forecast.add_argument('--periods', type=int, default=30)
+    forecast.add_argument('--order', type=int, nargs=3, default=[1, 0, 0])
+    forecast.add_argument('--season', type=int, default=7, help='season length for the batched models')
+    forecast.add_argument('--output', default='forecast.csv')
+    forecast.set_defaults(func=cmd_forecast)
+
+    intraday = subparsers.add_parser('intraday', help='forecast the next 5-minute intervals')
+    intraday.add_argument('--steps', type=int, default=12)
+    intraday.add_argument('--window-days', type=int, default=14, help='sliding fit window in days')
+    intraday.add_argument('--lags', type=int, default=3)
+    intraday.add_argument('--kpi', default='transaction_success_rate', help='series to plot')
+    intraday.add_argument('--output', default='intraday_forecast.csv')
+    intraday.set_defaults(func=cmd_intraday)
+
+    explain = subparsers.add_parser('explain', help='SHAP importances for the stored model')
+    explain.add_argument('--model-name', default='kpi_degradation')
+    explain.add_argument('--version', type=int, default=None)
+    explain.add_argument('--shap-root', default='shap_store')
+    explain.add_argument('--by', choices=['day', 'hour'], default=None)
+    explain.add_argument('--start', default=None)
+    explain.add_argument('--end', default=None)
+    explain.set_defaults(func=cmd_explain)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
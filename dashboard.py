@@ -7,7 +7,7 @@ Original file is located at
     https://colab.research.google.com/drive/11B56SxfDPHc89vDyNFtqqnM6UD_Pp94m
 """
 
-!pip install streamlit pandas plotly shap matplotlib pyngrok prophet
+!pip install streamlit pandas plotly shap matplotlib pyngrok prophet pyarrow
 
 # Commented out IPython magic to ensure Python compatibility.
 # %%writefile dashboard.py
@@ -18,64 +18,53 @@ Original file is located at
 # import plotly.express as px
 # import shap
 # import matplotlib.pyplot as plt
-# import pickle
-# import joblib
-# import os
-# from google.colab import drive
-# from prophet import Prophet
+# from feature_store import read_table
+# from forecast_cache import cached_prophet_forecast
+# from shap_store import ShapStore, store_key
+# from model_store import load_model
+# from chart_queries import query_series, downsample, latest_values, column_means
 # import plotly.graph_objects as go
 # 
 # 
-# model_path = "/content/drive/MyDrive/kpi_degradation_rf_model.pkl"
-# if os.path.exists(model_path):
-#     model = joblib.load(model_path)
-#     print("Model Loaded Successfully!")
-# else:
-#     raise FileNotFoundError("Model not found in Google Drive!")
-# 
-# df = pd.read_csv("final_feature_engineered_data.csv")
+# model, model_metadata = load_model("kpi_degradation")
+# print(f"Model version {model_metadata['version']} loaded successfully!")
 # 
 # features = ['cpu_usage', 'memory_usage', 'response_time', 'error_rate']
-# X = df[features]
-# y = df["transaction_success_rate"]
 # 
-# explainer = shap.TreeExplainer(model)
-# shap_values = explainer.shap_values(X)
+# # Only intervals that have not been explained for this model version are read and sent to SHAP
+# shap_store = ShapStore(features, store_key(model_metadata['name'], model_metadata['version']))
+# new_df = read_table("features", columns=["interval"] + features, start=shap_store.last_interval())
+# shap_store.update(model, new_df)
 # 
 # # --- FEATURE IMPORTANCE ---
 # st.subheader("🔍 Feature Importance (SHAP Analysis)")
-# shap_df = pd.DataFrame(
-#     {"Feature": X.columns, "SHAP Importance": np.abs(shap_values).mean(axis=0)}
-# ).sort_values(by="SHAP Importance", ascending=False)
+# shap_df = shap_store.importance()
 # 
 # fig = px.bar(shap_df, x="SHAP Importance", y="Feature", orientation="h", title="Top Features Driving KPI")
 # st.plotly_chart(fig)
 # 
 # 
-# daily_df = pd.read_csv("daily_aggregated_features.csv")
+# daily_df = read_table("daily")
 # 
 # # # --- KPI TREND VISUALIZATION ---
 # st.subheader("📈 KPI Trend Over Time")
-# fig = px.line(daily_df, x=daily_df['date'], y="transaction_success_rate", title="KPI Performance")
+# trend_df = query_series("daily", "transaction_success_rate", points=500)
+# fig = px.line(trend_df, x="date", y="transaction_success_rate", title="KPI Performance")
 # st.plotly_chart(fig)
 # 
 # 
 # # --- Forecasting ---
 # prophet_df = daily_df.reset_index().rename(columns={"date": "ds", "transaction_success_rate": "y"})
 # 
-# # # Train a Prophet model
-# model = Prophet()
-# model.fit(prophet_df)
-# 
-# # Make future predictions
-# future = model.make_future_dataframe(periods=30)
-# forecast = model.predict(future)
+# # Fit a Prophet model only when the daily data changes, otherwise reuse the cached forecast
+# forecast = cached_prophet_forecast(prophet_df, periods=30)
 # 
 # # Plot results
 # st.subheader("Forecasting")
 # fig = go.Figure()
 # fig.add_trace(go.Scatter(x=prophet_df["ds"], y=prophet_df["y"], mode='markers', name="Actual Data"))
-# fig.add_trace(go.Scatter(x=forecast["ds"], y=forecast["yhat"], mode='lines', name="Forecast"))
+# forecast_points = downsample(forecast, "ds", "yhat", points=500)
+# fig.add_trace(go.Scatter(x=forecast_points["ds"], y=forecast_points["yhat"], mode='lines', name="Forecast"))
 # 
 # # Display in Streamlit
 # st.plotly_chart(fig)
@@ -83,17 +72,21 @@ Original file is located at
 # 
 # # --- SYSTEM HEALTH MONITORING ---
 # st.subheader("🖥️ System Health Monitoring")
+# health_metrics = ["response_time", "error_rate", "cpu_usage", "memory_usage"]
+# latest = latest_values("features", health_metrics + ["transaction_success_rate"])
+# # Delta against the mean over all 5-minute intervals, as before; only these columns are read
+# interval_means = column_means("features", health_metrics)
 # cols = st.columns(4)
-# for i, metric in enumerate(["response_time", "error_rate", "cpu_usage", "memory_usage"]):
-#     value = df[metric].iloc[-1]
-#     cols[i].metric(label=metric.replace("_", " ").title(), value=value, delta=f"{value - df[metric].mean():.2f}")
+# for i, metric in enumerate(health_metrics):
+#     value = latest[metric]
+#     cols[i].metric(label=metric.replace("_", " ").title(), value=value, delta=f"{value - interval_means[metric]:.2f}")
 # 
 # 
 # # --- ALERTS & RECOMMENDATIONS ---
 # st.subheader("⚠️ Alerts & Recommendations")
-# if df["transaction_success_rate"].iloc[-1] < 0.6:
+# if latest["transaction_success_rate"] < 0.6:
 #     st.error("🚨 KPI is below the threshold! Investigate high response times & errors.")
-# elif df["transaction_success_rate"].iloc[-1] < 0.8:
+# elif latest["transaction_success_rate"] < 0.8:
 #     st.warning("⚠️ KPI is slightly below the optimal range. Monitor system performance.")
 # else:
 #     st.success("✅ KPI is within the acceptable range.")
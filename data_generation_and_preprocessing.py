@@ -13,6 +13,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
+from interval_kpi import interval_kpis
+from feature_store import write_table
+from streaming_join import align_frames
+from schema import coerce, read_csv
 
 # Set random seed for reproducibility
 random.seed(42)
@@ -47,11 +51,8 @@ def generate_business_kpi_data():
     df = pd.DataFrame(data)
 
     # Calculate transaction success rate for each 5-minute interval
-    df['interval'] = df['timestamp'].dt.floor('5T')
-    interval_kpi = df.groupby('interval').apply(lambda x: pd.Series({
-        'transaction_success_rate': x['payment_status'].value_counts(normalize=True).get('Success', 0) * 100,
-        'total_transactions': len(x),
-    })).reset_index()
+    df['interval'] = df['timestamp'].dt.floor('5min')
+    interval_kpi = interval_kpis(df)
     return df, interval_kpi
 
 # Simulate IT Metrics Data with 5-minute granularity
@@ -81,9 +82,14 @@ def generate_it_metrics_data():
 business_kpi_df, interval_kpi_df = generate_business_kpi_data()
 it_metrics_df = generate_it_metrics_data()
 
-business_kpi_df.to_csv('raw_business_kpi_data.csv', index=False)
-interval_kpi_df.to_csv('raw_interval_business_kpi_data.csv', index=False)
-it_metrics_df.to_csv('raw_it_metrics_data.csv', index=False)
+coerce(business_kpi_df).to_csv('raw_business_kpi_data.csv', index=False)
+coerce(interval_kpi_df).to_csv('raw_interval_business_kpi_data.csv', index=False)
+coerce(it_metrics_df).to_csv('raw_it_metrics_data.csv', index=False)
+
+# Columnar copies for downstream stages (typed, date-partitioned Parquet)
+write_table(business_kpi_df, 'business_kpi')
+write_table(interval_kpi_df, 'interval_kpi')
+write_table(it_metrics_df, 'it_metrics')
 
 # Handling missing values
 business_kpi_df['timestamp'].ffill(inplace=True)
@@ -94,7 +100,6 @@ business_kpi_df['payment_status'] = business_kpi_df['payment_status'].fillna('Un
 business_kpi_df.drop_duplicates(inplace=True)
 
 # Handling missing values
-it_metrics_df['timestamp'].ffill(inplace=True)
 it_metrics_df['cpu_usage'] = it_metrics_df['cpu_usage'].fillna(it_metrics_df['cpu_usage'].mean())
 it_metrics_df['memory_usage'] = it_metrics_df['memory_usage'].fillna(it_metrics_df['memory_usage'].mean())
 
@@ -121,10 +126,10 @@ it_metrics_df['memory_usage'].fillna(it_metrics_df['memory_usage'].mean(), inpla
 it_metrics_df['response_time'].fillna(it_metrics_df['response_time'].mean(), inplace=True)
 it_metrics_df['error_rate'].fillna(it_metrics_df['error_rate'].mean(), inplace=True)
 
-# Align datasets by timestamps (5-minute granularity)
+# Align datasets by timestamps (5-minute granularity); events without a timestamp are
+# counted and dropped by the join instead of being forward-filled into another interval
 def align_datasets(interval_kpi_df, it_metrics_df):
-    interval_metrics = it_metrics_df.groupby('interval').mean().reset_index()
-    aligned_df = pd.merge(interval_kpi_df, interval_metrics, on='interval', how='outer')
+    aligned_df = align_frames(interval_kpi_df, it_metrics_df)
     return aligned_df
 
 aligned_df = align_datasets(interval_kpi_df, it_metrics_df)
@@ -231,11 +236,16 @@ daily_aggregates = aligned_df.groupby(aligned_df['interval'].dt.date).agg({
 }).reset_index().rename(columns={'interval': 'date'})
 
 # Save Aggregates
-daily_aggregates.to_csv('daily_aggregated_features.csv', index=False)
+coerce(daily_aggregates).to_csv('daily_aggregated_features.csv', index=False)
 
 # Save Final Dataset
+aligned_df = coerce(aligned_df)
 aligned_df.to_csv('final_feature_engineered_data.csv', index=False)
 
+# Save to the feature store
+write_table(daily_aggregates, 'daily')
+write_table(aligned_df, 'features')
+
 print("Feature engineering completed. Final dataset saved.")
 
 
@@ -251,7 +261,7 @@ plt.legend()
 plt.tight_layout()
 plt.show()
 
-df = pd.read_csv("final_feature_engineered_data.csv", index_col="interval", parse_dates=True)
+df = read_csv("final_feature_engineered_data.csv").set_index("interval")
 
 # Display the first few rows of the dataframe to understand its structure
 df.head()
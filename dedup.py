@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Constant-memory duplicate removal for continuous ingestion.
+
+``drop_duplicates()`` hashes whole rows of the whole frame, so its memory grows
+with history. Both classes here, also used by ``streaming_preprocessing``,
+take a key (``transaction_id`` and timestamp for transactions; timestamp, service
+and metric values for IT metrics; ``None`` for the whole row, as ``drop_duplicates()``
+does) and keep a bounded amount of state:
+
+- ``WindowedDeduplicator`` is exact within a sliding time window. Key hashes are
+  kept in per-bucket sorted arrays and whole buckets are evicted once they fall
+  ``window`` behind the newest event. Older rows cannot be checked; they are
+  kept and counted as ``expired``.
+- ``BloomDeduplicator`` uses a rotating Bloom filter. ``generations`` filters of
+  ``capacity`` keys each are sized for ``fp_rate``, and the oldest is cleared
+  when the newest fills up. Memory is fixed, but a unique row is dropped with
+  probability of at most about ``generations * fp_rate``.
+
+``keep(df)`` returns a boolean mask (the first occurrence of each key is kept)
+and ``stats`` counts rows, dropped duplicates and the rest.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+# Generated ids are six random digits, so the timestamp is needed to tell collisions from retries
+BUSINESS_KEY = ['transaction_id', 'timestamp']
+# Metric timestamps are not unique on their own
+METRICS_KEY = ['timestamp', 'service', 'cpu_usage', 'memory_usage', 'response_time', 'error_rate']
+
+
+def key_hashes(df, key_columns):
+    """64-bit hash per row of the key columns that exist in ``df`` (every column for ``None``)."""
+    columns = list(df.columns) if key_columns is None else [c for c in key_columns if c in df.columns]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _first_in_chunk(hashes):
+    _, first = np.unique(hashes, return_index=True)
+    keep = np.zeros(len(hashes), dtype=bool)
+    keep[first] = True
+    return keep
+
+
+class WindowedDeduplicator:
+    def __init__(self, key_columns=BUSINESS_KEY, time_column='timestamp', window='1D', bucket='1h'):
+        self.key_columns = None if key_columns is None else list(key_columns)
+        self.time_column = time_column
+        self.window = pd.Timedelta(window).value
+        self.bucket = pd.Timedelta(bucket).value
+        self.buckets = {}
+        self.watermark = None
+        # Keys older than this were evicted and can no longer be checked
+        self.evicted_before = None
+        self.stats = {'rows': 0, 'duplicates': 0, 'expired': 0, 'evicted_keys': 0}
+
+    @property
+    def memory_bytes(self):
+        return sum(keys.nbytes for keys in self.buckets.values())
+
+    def keep(self, df):
+        hashes = key_hashes(df, self.key_columns)
+        times = pd.to_datetime(df[self.time_column]).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        untimed = times == np.iinfo(np.int64).min
+        if (~untimed).any():
+            newest = times[~untimed].max()
+            self.watermark = newest if self.watermark is None else max(self.watermark, newest)
+        if self.watermark is None:
+            times = np.zeros(len(df), dtype=np.int64)
+        else:
+            # Untimed rows are checked against, and stored in, the newest bucket
+            times = np.where(untimed, self.watermark, times)
+
+        keep = _first_in_chunk(hashes)
+        for keys in self.buckets.values():
+            keep &= ~np.isin(hashes, keys)
+        if self.evicted_before is None:
+            expired = np.zeros(len(df), dtype=bool)
+        else:
+            expired = times < self.evicted_before
+        self.stats['rows'] += len(df)
+        self.stats['duplicates'] += int((~keep).sum())
+        self.stats['expired'] += int((keep & expired).sum())
+
+        stored = keep & ~expired
+        bucket_ids = times[stored] // self.bucket
+        for bucket_id in np.unique(bucket_ids):
+            new = hashes[stored][bucket_ids == bucket_id]
+            existing = self.buckets.get(bucket_id)
+            self.buckets[bucket_id] = np.unique(new) if existing is None else np.union1d(existing, new)
+        if self.watermark is not None:
+            horizon = self.watermark - self.window
+            for bucket_id in [b for b in self.buckets if (b + 1) * self.bucket <= horizon]:
+                self.stats['evicted_keys'] += len(self.buckets.pop(bucket_id))
+                end = (bucket_id + 1) * self.bucket
+                self.evicted_before = end if self.evicted_before is None else max(self.evicted_before, end)
+        return keep
+
+
+class RotatingBloomFilter:
+    def __init__(self, capacity=1_000_000, fp_rate=0.001, generations=2):
+        self.capacity = capacity
+        self.generations = generations
+        self.n_bits = max(int(math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)), 8)
+        self.n_hashes = max(int(round(self.n_bits / capacity * math.log(2))), 1)
+        self.filters = [np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)]
+        self.count = 0
+        self.rotations = 0
+
+    @property
+    def memory_bytes(self):
+        return self.generations * self.filters[0].nbytes
+
+    def _positions(self, hashes):
+        # Double hashing: the i-th probe is h1 + i * h2, from the two halves of one 64-bit hash
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        probes = np.arange(self.n_hashes, dtype=np.uint64)
+        return (h1[:, None] + probes[None, :] * h2[:, None]) % np.uint64(self.n_bits)
+
+    def contains(self, hashes):
+        positions = self._positions(hashes)
+        byte, bit = (positions >> np.uint64(3)).astype(np.int64), (positions & np.uint64(7)).astype(np.uint8)
+        found = np.zeros(len(hashes), dtype=bool)
+        for bits in self.filters:
+            found |= ((bits[byte] >> bit) & 1).all(axis=1).astype(bool)
+        return found
+
+    def add(self, hashes):
+        start = 0
+        while start < len(hashes):
+            if self.count >= self.capacity:
+                self.filters.append(np.zeros_like(self.filters[0]))
+                if len(self.filters) > self.generations:
+                    self.filters.pop(0)
+                self.count = 0
+                self.rotations += 1
+            batch = hashes[start:start + self.capacity - self.count]
+            positions = self._positions(batch).ravel()
+            byte, bit = (positions >> np.uint64(3)).astype(np.int64), (positions & np.uint64(7)).astype(np.uint8)
+            np.bitwise_or.at(self.filters[-1], byte, np.left_shift(1, bit).astype(np.uint8))
+            self.count += len(batch)
+            start += len(batch)
+
+
+class BloomDeduplicator:
+    def __init__(self, key_columns=BUSINESS_KEY, capacity=1_000_000, fp_rate=0.001, generations=2):
+        self.key_columns = None if key_columns is None else list(key_columns)
+        self.filter = RotatingBloomFilter(capacity, fp_rate, generations)
+        self.stats = {'rows': 0, 'duplicates': 0}
+
+    @property
+    def memory_bytes(self):
+        return self.filter.memory_bytes
+
+    def keep(self, df):
+        hashes = key_hashes(df, self.key_columns)
+        keep = _first_in_chunk(hashes)
+        keep &= ~self.filter.contains(hashes)
+        self.filter.add(hashes[keep])
+        self.stats['rows'] += len(df)
+        self.stats['duplicates'] += int((~keep).sum())
+        self.stats['rotations'] = self.filter.rotations
+        return keep
+
+
+def make_deduplicator(kind='window', key_columns=BUSINESS_KEY, **kwargs):
+    """``'window'`` for ``WindowedDeduplicator`` or ``'bloom'`` for ``BloomDeduplicator``."""
+    if kind == 'window':
+        return WindowedDeduplicator(key_columns, **kwargs)
+    if kind == 'bloom':
+        return BloomDeduplicator(key_columns, **kwargs)
+    raise ValueError(f"Unknown deduplicator: {kind!r}")
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Columnar, date-partitioned feature store.
+
+Parquet replacement for the CSV hand-off files (``raw_*_data.csv``,
+``final_feature_engineered_data.csv`` and ``daily_aggregated_features.csv``).
+Each table is a hive-partitioned Parquet dataset under ``<root>/<name>/``, one
+partition per day (or month for daily aggregates), written with a fixed schema
+so readers get typed columns without ``parse_dates``. Column types are the
+compact ones from ``schema`` (float32 metrics, int8 flags, categorical status),
+applied on write and again on read. Reads support column projection, time-range
+filters that prune partitions, and memory-mapped files.
+"""
+
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from schema import IT_METRIC_COLUMNS, coerce, arrow_schema
+
+STORE_ROOT = 'feature_store'
+PARTITION_COLUMN = 'date_partition'
+
+_KPI_FEATURES = ['transaction_success_rate'] + IT_METRIC_COLUMNS
+_FEATURE_COLUMNS = (
+    ['interval', 'transaction_success_rate', 'total_transactions', 'timestamp'] + IT_METRIC_COLUMNS
+    + [f'{c}_lag1' for c in _KPI_FEATURES]
+    + [f'{c}_{stat}' for c in _KPI_FEATURES for stat in ('rolling_mean', 'rolling_std')]
+    + ['cpu_memory_interaction', 'hour', 'day_of_week', 'is_weekend', 'payment_status_encoded',
+       'high_error_rate_flag', 'response_time_spike_flag']
+)
+
+# name -> (schema, time column, partition granularity); column types come from ``schema.column_dtype``
+TABLES = {
+    'business_kpi': (arrow_schema(['timestamp', 'transaction_id', 'amount', 'payment_status', 'interval']),
+                     'interval', 'D'),
+    'interval_kpi': (arrow_schema(['interval', 'transaction_success_rate', 'total_transactions']), 'interval', 'D'),
+    'it_metrics': (arrow_schema(['timestamp'] + IT_METRIC_COLUMNS + ['interval']), 'interval', 'D'),
+    'features': (arrow_schema(_FEATURE_COLUMNS), 'interval', 'D'),
+    'daily': (arrow_schema(['date'] + _KPI_FEATURES), 'date', 'M'),
+}
+
+
+def _partition_format(granularity):
+    return '%Y-%m' if granularity == 'M' else '%Y-%m-%d'
+
+
+def table_spec(name, time_column=None, granularity=None):
+    schema, default_time_column, default_granularity = TABLES.get(name, (None, 'interval', 'D'))
+    return schema, time_column or default_time_column, granularity or default_granularity
+
+
+def _to_arrow(df, schema):
+    if schema is None:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    # Keep schema order for known columns; extra columns (e.g. 'service') are inferred
+    known = [f for f in schema if f.name in df.columns]
+    extra = [c for c in df.columns if c not in schema.names]
+    table = pa.Table.from_pandas(df[[f.name for f in known] + extra], preserve_index=False)
+    return table.cast(pa.schema(known + [table.schema.field(c) for c in extra]))
+
+
+def write_table(df, name, root=STORE_ROOT, time_column=None, granularity=None, mode='overwrite'):
+    """Write ``df`` to the ``name`` dataset.
+
+    ``mode='overwrite'`` replaces only the partitions ``df`` touches; ``mode='append'``
+    adds new files next to the existing ones. Rows with a missing time value are
+    stored in the ``__null__`` partition.
+    """
+    schema, time_column, granularity = table_spec(name, time_column, granularity)
+    df = coerce(df)
+    df[time_column] = pd.to_datetime(df[time_column])
+    partition = df[time_column].dt.strftime(_partition_format(granularity))
+    table = _to_arrow(df, schema).append_column(PARTITION_COLUMN, pa.array(partition.fillna('__null__'), pa.string()))
+    ds.write_dataset(
+        table,
+        os.path.join(root, name),
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive'),
+        existing_data_behavior='delete_matching' if mode == 'overwrite' else 'overwrite_or_ignore',
+        basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+    )
+
+
+def dataset(name, root=STORE_ROOT, memory_map=False):
+    filesystem = pafs.LocalFileSystem(use_mmap=memory_map)
+    return ds.dataset(os.path.join(root, name), format='parquet', partitioning='hive', filesystem=filesystem)
+
+
+def read_table(name, columns=None, start=None, end=None, root=STORE_ROOT, memory_map=False,
+               time_column=None, granularity=None):
+    """Load ``columns`` of ``name`` for ``start <= time < end`` as a DataFrame.
+
+    The time range is pushed down twice: to the partition key, so whole days are
+    skipped without opening their files, and to the Parquet row-group statistics.
+    """
+    _, time_column, granularity = table_spec(name, time_column, granularity)
+    data = dataset(name, root, memory_map)
+
+    expression = None
+    fmt = _partition_format(granularity)
+    if start is not None:
+        start = pd.Timestamp(start)
+        expression = (ds.field(PARTITION_COLUMN) >= start.strftime(fmt)) & (ds.field(time_column) >= start.to_datetime64())
+    if end is not None:
+        end = pd.Timestamp(end)
+        bound = (ds.field(PARTITION_COLUMN) <= end.strftime(fmt)) & (ds.field(time_column) < end.to_datetime64())
+        expression = bound if expression is None else expression & bound
+    if expression is not None:
+        # '__null__' sorts after every date, exclude it explicitly from ranged reads
+        expression = expression & (ds.field(PARTITION_COLUMN) != '__null__')
+
+    if columns is None:
+        columns = [c for c in data.schema.names if c != PARTITION_COLUMN]
+    df = data.to_table(columns=list(columns), filter=expression).to_pandas()
+    if time_column in df.columns:
+        df = df.sort_values(time_column, kind='stable').reset_index(drop=True)
+    return coerce(df)
+
+
+def partitions(name, root=STORE_ROOT):
+    """Sorted partition values of ``name`` (without ``__null__``), from the directory listing only."""
+    entries = [p for p in os.listdir(os.path.join(root, name)) if p.startswith(f'{PARTITION_COLUMN}=')]
+    return sorted(p.split('=', 1)[1] for p in entries if not p.endswith('__null__'))
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Cache of fitted forecast frames keyed by training data and model config.
+
+The dashboard refits ``Prophet()`` on every Streamlit rerun. ``ForecastCache``
+hashes the training series together with the model parameters and forecast
+horizon; a hit returns the stored forecast frame, a miss fits once and persists
+the result as Parquet. Entries are evicted least-recently-used, both in memory
+and on disk.
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+import pandas as pd
+
+CACHE_DIR = 'forecast_cache'
+
+
+def series_key(df, config):
+    """Content hash of the training frame plus the JSON-serialised model config."""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(json.dumps(list(map(str, df.columns))).encode())
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class ForecastCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=32, max_memory_entries=8):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.parquet')
+
+    def _remember(self, key, forecast):
+        self.memory[key] = forecast
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self):
+        # The file mtime is refreshed on every hit, so the oldest mtime is the LRU entry
+        entries = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if f.endswith('.parquet')]
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:max(len(entries) - self.max_entries, 0)]:
+            os.remove(path)
+
+    def get(self, key):
+        path = self._path(key)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            if os.path.exists(path):
+                os.utime(path)
+            return self.memory[key]
+        if os.path.exists(path):
+            os.utime(path)
+            forecast = pd.read_parquet(path)
+            self._remember(key, forecast)
+            return forecast
+        return None
+
+    def put(self, key, forecast):
+        forecast.to_parquet(self._path(key), index=False)
+        self._remember(key, forecast)
+        self._evict()
+
+    def get_or_fit(self, df, config, fit_fn):
+        """Return the forecast for ``df``/``config``, calling ``fit_fn(df, config)`` only on a miss."""
+        key = series_key(df, config)
+        forecast = self.get(key)
+        if forecast is not None:
+            self.hits += 1
+            return forecast
+        self.misses += 1
+        forecast = fit_fn(df, config)
+        self.put(key, forecast)
+        return forecast
+
+
+def fit_prophet(df, config):
+    """Fit Prophet on a ``ds``/``y`` frame and forecast ``config['periods']`` days ahead."""
+    from prophet import Prophet
+
+    params = {k: v for k, v in config.items() if k not in ('model', 'periods')}
+    model = Prophet(**params)
+    model.fit(df)
+    future = model.make_future_dataframe(periods=config.get('periods', 30))
+    return model.predict(future)
+
+
+_default_cache = None
+
+
+def cached_prophet_forecast(df, periods=30, cache=None, **prophet_params):
+    """Prophet forecast for ``df`` (``ds``/``y`` columns), refit only when the data or params change."""
+    global _default_cache
+    if cache is None:
+        if _default_cache is None:
+            _default_cache = ForecastCache()
+        cache = _default_cache
+    config = dict(prophet_params, model='prophet', periods=periods)
+    return cache.get_or_fit(df[['ds', 'y']], config, fit_prophet)
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Time-series-aware hyperparameter search for the Random Forest and XGBoost classifiers.
+
+``model_building.py`` trains ``RandomForestClassifier(n_estimators=100)`` and
+``XGBClassifier`` once with fixed parameters on a random ``train_test_split``.
+``search()`` instead scores sampled configurations on expanding-window folds in
+time order and prunes them with successive halving: every rung trains the
+surviving candidates with ``eta`` times more trees / boosting rounds and keeps the
+best ``1/eta``. XGBoost trials also stop early on the validation fold.
+
+Fold matrices are built once (float32 arrays, plus ``DMatrix`` objects for
+XGBoost) and shared by all trials. Trials run on a thread pool with one thread
+per model, since both libraries release the GIL while building trees and the
+cached ``DMatrix`` objects cannot be shipped to other processes.
+"""
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+SearchResult = namedtuple('SearchResult', ['best_params', 'best_score', 'time_to_best', 'total_seconds', 'trials'])
+
+XGB_SPACE = {
+    'max_depth': [3, 4, 6, 8],
+    'learning_rate': [0.03, 0.1, 0.3],
+    'subsample': [0.7, 0.85, 1.0],
+    'colsample_bytree': [0.7, 1.0],
+    'min_child_weight': [1, 5, 10],
+}
+RF_SPACE = {
+    'max_depth': [None, 6, 10, 16],
+    'min_samples_leaf': [1, 5, 20],
+    'max_features': ['sqrt', None],
+    'class_weight': [None, 'balanced'],
+}
+
+
+def time_folds(n_rows, n_splits=5, min_train=None):
+    """Expanding-window ``(train_slice, valid_slice)`` pairs over time-ordered rows."""
+    min_train = min_train or n_rows // (n_splits + 1)
+    edges = np.linspace(min_train, n_rows, n_splits + 1).astype(int)
+    return [(slice(0, edges[i]), slice(edges[i], edges[i + 1])) for i in range(n_splits)]
+
+
+class FoldCache:
+    """Fold matrices built once and reused by every trial."""
+
+    def __init__(self, X, y, folds, xgboost=False):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.int32)
+        self.folds = []
+        for train, valid in folds:
+            if len(np.unique(y[valid])) < 2 or len(np.unique(y[train])) < 2:
+                continue  # AUC is undefined on a single-class fold
+            fold = {'X_train': X[train], 'y_train': y[train], 'X_valid': X[valid], 'y_valid': y[valid]}
+            if xgboost:
+                import xgboost as xgb
+                fold['dtrain'] = xgb.DMatrix(fold['X_train'], label=fold['y_train'], nthread=-1)
+                fold['dvalid'] = xgb.DMatrix(fold['X_valid'], label=fold['y_valid'], nthread=-1)
+            self.folds.append(fold)
+        if not self.folds:
+            raise ValueError("No time fold contains both classes")
+
+
+def _score_xgb(params, budget, cache, early_stopping_rounds):
+    import xgboost as xgb
+    from sklearn.metrics import roc_auc_score
+
+    booster_params = dict(params, objective='binary:logistic', eval_metric='auc', nthread=1, verbosity=0)
+    scores, rounds = [], []
+    for fold in cache.folds:
+        booster = xgb.train(booster_params, fold['dtrain'], num_boost_round=budget,
+                            evals=[(fold['dvalid'], 'valid')], early_stopping_rounds=early_stopping_rounds,
+                            verbose_eval=False)
+        best = booster.best_iteration + 1
+        prediction = booster.predict(fold['dvalid'], iteration_range=(0, best))
+        scores.append(roc_auc_score(fold['y_valid'], prediction))
+        rounds.append(best)
+    return float(np.mean(scores)), int(np.max(rounds))
+
+
+def _score_rf(params, budget, cache, random_state):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import roc_auc_score
+
+    scores = []
+    for fold in cache.folds:
+        model = RandomForestClassifier(n_estimators=budget, n_jobs=1, random_state=random_state, **params)
+        model.fit(fold['X_train'], fold['y_train'])
+        scores.append(roc_auc_score(fold['y_valid'], model.predict_proba(fold['X_valid'])[:, 1]))
+    return float(np.mean(scores)), budget
+
+
+def _sample(space, n, rng):
+    candidates, seen = [], set()
+    total = int(np.prod([len(v) for v in space.values()]))
+    while len(candidates) < min(n, total):
+        params = {k: v[rng.integers(len(v))] for k, v in space.items()}
+        key = tuple(sorted((k, str(v)) for k, v in params.items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+def search(X, y, model='xgboost', n_candidates=27, eta=3, min_budget=20, max_budget=540, n_splits=5,
+           space=None, early_stopping_rounds=20, n_jobs=None, random_state=42):
+    """Successive-halving search over time-ordered folds; rows of ``X``/``y`` must be in time order."""
+    rng = np.random.default_rng(random_state)
+    space = space or (XGB_SPACE if model == 'xgboost' else RF_SPACE)
+    cache = FoldCache(X, y, time_folds(len(y), n_splits), xgboost=model == 'xgboost')
+    candidates = _sample(space, n_candidates, rng)
+
+    def evaluate(params, budget):
+        if model == 'xgboost':
+            return _score_xgb(params, budget, cache, early_stopping_rounds)
+        return _score_rf(params, budget, cache, random_state)
+
+    start = time.perf_counter()
+    trials, best = [], (-np.inf, None, None)
+    budget, rung = min_budget, 0
+    with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count()) as pool:
+        while candidates:
+            futures = [pool.submit(evaluate, params, budget) for params in candidates]
+            scored = []
+            for params, future in zip(candidates, futures):
+                score, used = future.result()
+                elapsed = time.perf_counter() - start
+                trials.append(dict(params, rung=rung, budget=budget, used_budget=used, score=score, elapsed=elapsed))
+                scored.append((score, params, used))
+                if score > best[0]:
+                    best = (score, dict(params, n_estimators=used), elapsed)
+            if budget >= max_budget or len(candidates) == 1:
+                break
+            scored.sort(key=lambda item: item[0], reverse=True)
+            candidates = [params for _, params, _ in scored[:max(len(scored) // eta, 1)]]
+            budget, rung = min(budget * eta, max_budget), rung + 1
+
+    return SearchResult(best[1], best[0], best[2], time.perf_counter() - start, pd.DataFrame(trials))
+
+
+def search_degradation_model(features_df, model='xgboost', **kwargs):
+    """Tune the classifier on the ``degradation_flag`` label, with rows ordered by interval."""
+    from pipeline_stages import CLASSIFIER_FEATURES, TARGET, label_degradation
+
+    df = label_degradation(features_df).sort_values('interval')
+    return search(df[CLASSIFIER_FEATURES].to_numpy(), df[TARGET].to_numpy(), model=model, **kwargs)
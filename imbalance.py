@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Scalable class-imbalance handling for the degradation classifier.
+
+``model_building.py`` runs ``SMOTE(...).fit_resample`` on the whole dataset before
+the train/test split, which leaks synthetic points into the test set and runs an
+exact k-NN search over every row. ``rebalance()`` is applied to the training fold
+only and offers cheaper modes, selected by name:
+
+- ``'class_weight'``: no resampling; returns ``scale_pos_weight`` / sample weights;
+- ``'undersample'``: stratified undersampling of the majority class;
+- ``'smote'``: SMOTE-style oversampling where neighbours are searched among the
+  minority class only, against a bounded reference sample, in fixed-size chunks;
+- ``'none'``: leave the data unchanged.
+"""
+
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+METHODS = ['none', 'class_weight', 'undersample', 'smote']
+
+
+def _counts(y):
+    y = np.asarray(y)
+    positives = int((y == 1).sum())
+    return positives, len(y) - positives
+
+
+def class_weight_params(y, model='xgboost'):
+    """Estimator keyword arguments that reweight the minority class instead of resampling."""
+    positives, negatives = _counts(y)
+    if model == 'xgboost':
+        return {'scale_pos_weight': negatives / max(positives, 1)}
+    return {'class_weight': 'balanced'}
+
+
+def undersample(X, y, ratio=1.0, random_state=42):
+    """Keep every minority row and ``ratio`` majority rows per minority row."""
+    rng = np.random.default_rng(random_state)
+    y = np.asarray(y)
+    minority = 1 if (y == 1).sum() <= (y == 0).sum() else 0
+    minority_idx = np.flatnonzero(y == minority)
+    majority_idx = np.flatnonzero(y != minority)
+    keep = min(len(majority_idx), int(len(minority_idx) * ratio))
+    chosen = np.sort(np.concatenate([minority_idx, rng.choice(majority_idx, keep, replace=False)]))
+    return _take(X, chosen), y[chosen]
+
+
+def smote(X, y, ratio=1.0, k_neighbors=5, max_reference=50_000, chunk_size=10_000, random_state=42):
+    """Oversample the minority class to ``ratio`` x majority with bounded memory.
+
+    Only minority rows are indexed (as SMOTE needs), capped at ``max_reference`` rows
+    drawn at random, which makes the neighbour search approximate on very large
+    minorities. Queries and synthetic rows are produced ``chunk_size`` at a time.
+    """
+    from sklearn.neighbors import NearestNeighbors
+
+    rng = np.random.default_rng(random_state)
+    values = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    minority = 1 if (y == 1).sum() <= (y == 0).sum() else 0
+    minority_rows = values[y == minority]
+    n_new = int(ratio * (y != minority).sum()) - len(minority_rows)
+    if n_new <= 0 or len(minority_rows) < 2:
+        return X, y
+
+    reference = minority_rows
+    if len(reference) > max_reference:
+        reference = reference[rng.choice(len(reference), max_reference, replace=False)]
+    k = min(k_neighbors, len(reference) - 1)
+    index = NearestNeighbors(n_neighbors=k + 1).fit(reference)
+
+    synthetic = np.empty((n_new, values.shape[1]), dtype=np.float32)
+    for start in range(0, n_new, chunk_size):
+        size = min(chunk_size, n_new - start)
+        base = minority_rows[rng.integers(len(minority_rows), size=size)]
+        # Column 0 is usually the point itself when it is in the reference sample
+        neighbours = index.kneighbors(base, return_distance=False)[:, 1:]
+        partner = reference[neighbours[np.arange(size), rng.integers(k, size=size)]]
+        gap = rng.random((size, 1), dtype=np.float32)
+        synthetic[start:start + size] = base + gap * (partner - base)
+
+    if isinstance(X, pd.DataFrame):
+        X_out = pd.concat([X, pd.DataFrame(synthetic, columns=X.columns)], ignore_index=True)
+    else:
+        X_out = np.vstack([values, synthetic])
+    return X_out, np.concatenate([y, np.full(n_new, minority, dtype=y.dtype)])
+
+
+def _take(X, rows):
+    return X.iloc[rows] if isinstance(X, pd.DataFrame) else np.asarray(X)[rows]
+
+
+def rebalance(X_train, y_train, method='class_weight', model='xgboost', ratio=1.0, random_state=42, **kwargs):
+    """Apply ``method`` to the training fold; returns ``(X, y, estimator_kwargs)``."""
+    if method == 'none':
+        return X_train, y_train, {}
+    if method == 'class_weight':
+        return X_train, y_train, class_weight_params(y_train, model)
+    if method == 'undersample':
+        X, y = undersample(X_train, y_train, ratio, random_state)
+        return X, y, {}
+    if method == 'smote':
+        X, y = smote(X_train, y_train, ratio, random_state=random_state, **kwargs)
+        return X, y, {}
+    raise ValueError(f"Unknown imbalance method: {method!r}; expected one of {METHODS}")
+
+
+def benchmark(X, y, methods=METHODS, test_size=0.2, random_state=42):
+    """Runtime, peak traced memory and test recall of each method with an XGBoost classifier.
+
+    Rows must be in time order; the last ``test_size`` share is held out untouched.
+    """
+    from sklearn.metrics import recall_score, precision_score
+    from xgboost import XGBClassifier
+
+    split = int(len(y) * (1 - test_size))
+    X_train, X_test = _take(X, np.arange(split)), _take(X, np.arange(split, len(y)))
+    y = np.asarray(y)
+    y_train, y_test = y[:split], y[split:]
+
+    rows = []
+    for method in methods:
+        tracemalloc.start()
+        start = time.perf_counter()
+        X_fit, y_fit, params = rebalance(X_train, y_train, method, random_state=random_state)
+        resample_seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        model = XGBClassifier(eval_metric='logloss', random_state=random_state, **params)
+        model.fit(X_fit, y_fit)
+        fit_seconds = time.perf_counter() - start
+        y_pred = model.predict(X_test)
+        rows.append({
+            'method': method,
+            'train_rows': len(y_fit),
+            'resample_seconds': resample_seconds,
+            'resample_peak_mb': peak / 2 ** 20,
+            'fit_seconds': fit_seconds,
+            'recall': recall_score(y_test, y_pred, zero_division=0),
+            'precision': precision_score(y_test, y_pred, zero_division=0),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    from pipeline_stages import CLASSIFIER_FEATURES, TARGET, label_degradation
+    from schema import read_csv
+
+    df = label_degradation(read_csv('final_feature_engineered_data.csv'))
+    df = df.sort_values('interval')
+    print(benchmark(df[CLASSIFIER_FEATURES], df[TARGET]).to_string(index=False))
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""Incremental lag / rolling feature engine.
+
+Keeps the state needed by ``add_lag_features()`` and ``add_rolling_features()``
+(the last ``lag`` values and a ring buffer of the last ``window`` values with a
+running mean and Welford sum of squares per feature), so new 5-minute intervals
+can be featurized in O(1) each and appended to ``final_feature_engineered_data.csv``
+instead of recomputing the whole frame.
+
+Without a saved state (or with one that does not match the CSV), the engine is
+primed from the last rows already in the CSV. New rows are appended in place and
+the state records the CSV's byte length after each append; a later append first
+truncates the file back to that length, dropping rows a crash left half-written.
+"""
+
+import io
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from schema import coerce
+
+FEATURES = ['transaction_success_rate', 'cpu_usage', 'memory_usage', 'response_time', 'error_rate']
+
+
+def add_row_features(df):
+    """Row-local features from the notebook: interaction, time-based, encoding and anomaly flags."""
+    df['cpu_memory_interaction'] = df['cpu_usage'] * df['memory_usage']
+    df['hour'] = df['interval'].dt.hour
+    df['day_of_week'] = df['interval'].dt.dayofweek
+    df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
+    df['payment_status_encoded'] = (df['transaction_success_rate'] > 90).astype(int)
+    df['high_error_rate_flag'] = (df['error_rate'] > 0.15).astype(int)
+    df['response_time_spike_flag'] = (df['response_time'] > 3).astype(int)
+    return df
+
+
+class IncrementalFeatureEngine:
+    """Streaming equivalent of ``add_lag_features()`` + ``add_rolling_features()``.
+
+    Rolling statistics follow pandas' default ``min_periods=window``: a value is only
+    produced once the window holds ``window`` non-missing observations.
+    """
+
+    def __init__(self, lag_features=FEATURES, rolling_features=FEATURES, lag=1, window=12):
+        self.lag_features = list(lag_features)
+        self.rolling_features = list(rolling_features)
+        self.lag = lag
+        self.window = window
+
+        self.lag_buffer = np.full((len(self.lag_features), lag), np.nan)
+        self.ring = np.full((len(self.rolling_features), window), np.nan)
+        self.count = np.zeros(len(self.rolling_features), dtype=np.int64)
+        self.mean = np.zeros(len(self.rolling_features))
+        self.m2 = np.zeros(len(self.rolling_features))
+        self.position = 0
+        self.last_interval = None
+        # Size of the feature CSV when this state was saved
+        self.csv_bytes = None
+
+    def _push(self, values):
+        # Welford removal of the value leaving the window, then insertion of the new one
+        old = self.ring[:, self.position]
+        leaving = ~np.isnan(old)
+        if leaving.any():
+            n = self.count[leaving] - 1
+            delta = old[leaving] - self.mean[leaving]
+            mean = np.where(n > 0, self.mean[leaving] - delta / np.maximum(n, 1), 0.0)
+            self.m2[leaving] = np.where(n > 0, self.m2[leaving] - delta * (old[leaving] - mean), 0.0)
+            self.mean[leaving] = mean
+            self.count[leaving] = n
+
+        entering = ~np.isnan(values)
+        if entering.any():
+            n = self.count[entering] + 1
+            delta = values[entering] - self.mean[entering]
+            self.mean[entering] += delta / n
+            self.m2[entering] += delta * (values[entering] - self.mean[entering])
+            self.count[entering] = n
+
+        self.ring[:, self.position] = values
+        self.position = (self.position + 1) % self.window
+
+        full = self.count == self.window
+        rolling_mean = np.where(full, self.mean, np.nan)
+        variance = np.maximum(self.m2, 0.0) / max(self.window - 1, 1)
+        rolling_std = np.where(full, np.sqrt(variance), np.nan)
+        return rolling_mean, rolling_std
+
+    def update(self, df):
+        """Featurize new intervals (ordered by ``interval``) and return them with feature columns."""
+        df = df.copy()
+        if self.last_interval is not None:
+            df = df[df['interval'] > self.last_interval]
+        if df.empty:
+            return df
+
+        lag_values = df[self.lag_features].to_numpy(dtype=float)
+        rolling_values = df[self.rolling_features].to_numpy(dtype=float)
+        lags = np.empty_like(lag_values)
+        means = np.empty_like(rolling_values)
+        stds = np.empty_like(rolling_values)
+        for i in range(len(df)):
+            lags[i] = self.lag_buffer[:, 0]
+            self.lag_buffer = np.roll(self.lag_buffer, -1, axis=1)
+            self.lag_buffer[:, -1] = lag_values[i]
+            means[i], stds[i] = self._push(rolling_values[i])
+
+        for j, feature in enumerate(self.lag_features):
+            df[f'{feature}_lag{self.lag}'] = lags[:, j]
+        for j, feature in enumerate(self.rolling_features):
+            df[f'{feature}_rolling_mean'] = means[:, j]
+            df[f'{feature}_rolling_std'] = stds[:, j]
+        self.last_interval = df['interval'].iloc[-1]
+        return add_row_features(df)
+
+    def save(self, path):
+        """Persist the rolling state next to the feature file."""
+        state_path = path if path.endswith('.npz') else f'{path}.npz'
+        with open(f'{state_path}.tmp', 'wb') as f:
+            np.savez(f, lag_buffer=self.lag_buffer, ring=self.ring, count=self.count,
+                     mean=self.mean, m2=self.m2, position=self.position)
+        with open(f'{path}.json.tmp', 'w') as f:
+            json.dump({
+                'lag_features': self.lag_features,
+                'rolling_features': self.rolling_features,
+                'lag': self.lag,
+                'window': self.window,
+                'last_interval': None if self.last_interval is None else str(self.last_interval),
+                'csv_bytes': self.csv_bytes,
+            }, f)
+        os.replace(f'{state_path}.tmp', state_path)
+        os.replace(f'{path}.json.tmp', f'{path}.json')
+
+    @classmethod
+    def load(cls, path):
+        with open(f'{path}.json') as f:
+            meta = json.load(f)
+        engine = cls(meta['lag_features'], meta['rolling_features'], meta['lag'], meta['window'])
+        state = np.load(path if path.endswith('.npz') else f'{path}.npz')
+        engine.lag_buffer = state['lag_buffer']
+        engine.ring = state['ring']
+        engine.count = state['count']
+        engine.mean = state['mean']
+        engine.m2 = state['m2']
+        engine.position = int(state['position'])
+        if meta['last_interval'] is not None:
+            engine.last_interval = pd.Timestamp(meta['last_interval'])
+        engine.csv_bytes = meta.get('csv_bytes')
+        return engine
+
+
+def _tail_csv(path, n_rows, block_size=1 << 16):
+    """Last ``n_rows`` rows of a CSV, reading backwards from the end of the file."""
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        f.seek(0, os.SEEK_END)
+        position, tail = f.tell(), b''
+        while position > start and tail.count(b'\n') <= n_rows:
+            step = min(block_size, position - start)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+    lines = tail.splitlines()[-n_rows:] if position == start else tail.splitlines()[1:][-n_rows:]
+    return pd.read_csv(io.BytesIO(header + b'\n'.join(lines) + b'\n'), parse_dates=['interval'])
+
+
+def bootstrap_engine(output_path, **kwargs):
+    """Engine primed with the last rows of an existing feature CSV, as if it had produced them."""
+    engine = IncrementalFeatureEngine(**kwargs)
+    history = _tail_csv(output_path, engine.window + engine.lag)
+    if not history.empty:
+        engine.update(history)
+    return engine
+
+
+def append_features(new_intervals_df, output_path='final_feature_engineered_data.csv',
+                    state_path='feature_engine_state.npz'):
+    """Featurize only the new intervals and append them to the final feature CSV."""
+    engine = IncrementalFeatureEngine.load(state_path) if os.path.exists(f'{state_path}.json') else None
+    exists = os.path.exists(output_path)
+    if exists and engine is not None and engine.csv_bytes is not None \
+            and os.path.getsize(output_path) > engine.csv_bytes:
+        # Rows written after the last saved state belong to an interrupted append
+        with open(output_path, 'r+b') as f:
+            f.truncate(engine.csv_bytes)
+    if exists:
+        last_stored = _tail_csv(output_path, 1)['interval']
+        last_stored = last_stored.iloc[-1] if len(last_stored) else None
+        if engine is None or engine.last_interval != last_stored:
+            # No state, or state from another run of the CSV: rebuild it from the stored rows
+            engine = bootstrap_engine(output_path)
+    engine = engine or IncrementalFeatureEngine()
+
+    # update() drops intervals at or before the last one the engine has seen
+    features_df = engine.update(new_intervals_df.sort_values('interval'))
+    if not features_df.empty:
+        if exists:
+            features_df = features_df.reindex(columns=pd.read_csv(output_path, nrows=0).columns)
+        with open(output_path, 'a' if exists else 'w', newline='') as f:
+            coerce(features_df).to_csv(f, header=not exists, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+    if os.path.exists(output_path):
+        engine.csv_bytes = os.path.getsize(output_path)
+    engine.save(state_path)
+    return features_df
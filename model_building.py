@@ -7,7 +7,7 @@ Original file is located at
     https://colab.research.google.com/drive/1-DytHSOjUrdbj5qIlR6QXUHXieoW2rO3
 """
 
-!pip install pmdarima prophet
+!pip install pmdarima prophet pyarrow
 
 import warnings
 from statsmodels.tools.sm_exceptions import ConvergenceWarning
@@ -27,14 +27,17 @@ import statsmodels.api as sm
 from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
 from statsmodels.tsa.stattools import adfuller
 from sklearn.ensemble import RandomForestClassifier
-from pmdarima import auto_arima
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from prophet import Prophet
-from imblearn.over_sampling import SMOTE
+from imbalance import rebalance
+from shap_service import explain, global_importance, interaction_importance
 from xgboost import XGBClassifier
+from feature_store import read_table
+from arima_order_search import select_orders
+from backtest import backtest
 
 # Load forecasting data
-daily_data = pd.read_csv("daily_aggregated_features.csv", parse_dates=["date"], index_col="date")
+daily_data = read_table("daily").set_index("date")
 
 # Ensure the index has a proper frequency
 daily_data = daily_data.asfreq('D')
@@ -153,13 +156,12 @@ decomposition = sm.tsa.seasonal_decompose(daily_data["transaction_success_rate"]
 decomposition.plot()
 plt.show()
 
-# Auto-ARIMA to find optimal (p, d, q) and (P, D, Q, s)
-auto_model = auto_arima(daily_data["transaction_success_rate"], seasonal=True, m=7, trace=True, stepwise=True)
-print(auto_model.summary())
+# Auto-ARIMA to find optimal (p, d, q) and (P, D, Q, s), cached per series and run in parallel
+orders, order_report = select_orders({"transaction_success_rate": daily_data["transaction_success_rate"]}, seasonal=True, m=7, stepwise=True)
+print(order_report)
 
 # Extract best parameters
-best_order = auto_model.order
-best_seasonal_order = auto_model.seasonal_order
+best_order, best_seasonal_order = orders["transaction_success_rate"]
 print(f"Best Order: {best_order}")
 print(f"Best Seasonal Order: {best_seasonal_order}")
 
@@ -267,10 +269,25 @@ prophet_model.plot(forecast, ax=ax)
 plt.title("Prophet Model Forecasting")
 plt.show()
 
+"""***Rolling-origin backtest***"""
+
+# Evaluate ARIMA, SARIMA and Prophet over many cutoffs instead of a single split
+backtest_result = backtest(
+    daily_data["transaction_success_rate"],
+    models={
+        "arima": {"order": (1, 0, 0)},
+        "sarima": {"order": best_order, "seasonal_order": best_seasonal_order},
+        "prophet": {"seasonality_mode": "multiplicative"},
+    },
+    horizon=7,
+)
+print(backtest_result.by_horizon)
+print(backtest_result.timing)
+
 """***Random Forest***"""
 
 # Load supervised learning data
-supervised_data = pd.read_csv("final_feature_engineered_data.csv")
+supervised_data = read_table("features")
 
 supervised_data.dropna(subset=["timestamp", "cpu_usage", "memory_usage"], inplace=True)
 
@@ -335,19 +352,19 @@ else:
     print(f"\nXGBoost Regression RMSE: {rmse:.4f}")
 
 
-# Apply SMOTE to balance the dataset
-smote = SMOTE(sampling_strategy='auto', random_state=42)
-X_resampled, y_resampled = smote.fit_resample(supervised_data[features], supervised_data[target])
+# Split first so that the test set contains no synthetic rows
+X_train, X_test, y_train, y_test = train_test_split(supervised_data[features], supervised_data[target], test_size=0.2, random_state=42)
 
-# Check class distribution after balancing
-print("Class distribution after SMOTE:")
-print(y_resampled.value_counts())
+# Balance the training fold only: 'smote', 'undersample', 'class_weight' or 'none'
+imbalance_method = "smote"
+X_train, y_train, imbalance_params = rebalance(X_train, y_train, method=imbalance_method)
 
-# Split data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X_resampled, y_resampled, test_size=0.2, random_state=42)
+# Check class distribution after balancing
+print(f"Training class distribution after {imbalance_method}:")
+print(pd.Series(y_train).value_counts())
 
 # Train XGBoost model
-xgb_model = XGBClassifier(use_label_encoder=False, eval_metric='logloss')
+xgb_model = XGBClassifier(eval_metric='logloss', **imbalance_params)
 xgb_model.fit(X_train, y_train)
 
 # Predict and evaluate
@@ -365,32 +382,33 @@ print(f"XGBoost MAE: {mae:.4f}")
 print(f"XGBoost MSE: {mse:.4f}")
 print(f"XGBoost R2: {r2:.4f}")
 
-# Feature Importance using SHAP
-explainer = shap.Explainer(model)
-shap_values = explainer(X_test)
+# Feature Importance using SHAP, sharded over all cores and capped at 60 seconds
+explanation = explain(model, X_test, time_budget=60, interactions=True)
+X_explained = X_test.iloc[explanation.rows]
+print(f"Explained {len(explanation.rows)} of {len(X_test)} rows in {explanation.seconds:.1f}s")
+print(global_importance(explanation))
+print("Mean |SHAP interaction| between IT metrics:")
+print(interaction_importance(explanation))
 
 # Plot Feature Importance
-shap.summary_plot(shap_values, X_test)
+shap.summary_plot(explanation.values, X_explained)
 
 # Bar Plot: Shows mean absolute SHAP values per feature
-shap.summary_plot(shap_values, X_test, plot_type="bar")
+shap.summary_plot(explanation.values, X_explained, plot_type="bar")
 
 # Force Plot: Shows local impact on a single prediction
 shap.initjs()
-shap.force_plot(explainer.expected_value, shap_values.values[0], X_test.iloc[0])
-
-import pickle
-import joblib
-from google.colab import drive
-
-# Mount Google Drive
-drive.mount('/content/drive')
+shap.force_plot(explanation.base_value, explanation.values[0], X_explained.iloc[0])
 
-# Save trained model to Google Drive
-joblib.dump(xgb_model, '/content/drive/MyDrive/kpi_degradation_rf_model.pkl')
+from model_store import save_model
 
-# Save the best model
-with open('kpi_degradation_rf_model.pkl', 'wb') as f:
-    pickle.dump(xgb_model, f)
+# Save the best model as a new version in the local model store
+version = save_model(
+    xgb_model,
+    name="kpi_degradation",
+    features=features,
+    training_data=X_train,
+    metrics={"rmse": rmse, "mae": mae, "mse": mse, "r2": r2},
+)
 
-print("Model saved to Google Drive successfully!")
\ No newline at end of file
+print(f"Model saved to the model store (version {version})")
\ No newline at end of file
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Local, versioned model artifact store.
+
+Replaces ``joblib.dump`` to a mounted Google Drive path and ``pickle.dump`` to
+``kpi_degradation_rf_model.pkl``. Each save creates ``<root>/<name>/vNNNN/`` with
+the model and a ``metadata.json`` (feature list, training data hash, metrics).
+XGBoost models are written in the native UBJSON format, scikit-learn models as an
+uncompressed joblib file whose arrays are memory-mapped on load, so scoring and
+dashboard processes start without unpickling whole forests.
+
+A version is written to a temporary directory and renamed into place once its
+metadata is complete, so a crashed or concurrent save never exposes a partial
+``vNNNN``; directories without ``metadata.json`` are ignored.
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+from datetime import datetime, timezone
+import pandas as pd
+
+STORE_ROOT = 'model_store'
+XGB_FILE = 'model.ubj'
+SKLEARN_FILE = 'model.joblib'
+
+
+def data_hash(df):
+    """Content hash of the training frame, recorded with every version."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()).hexdigest()
+
+
+def _versions(model_dir, complete=True):
+    # Incomplete directories (no metadata.json) are skipped for loading but still hold their number
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(int(v[1:]) for v in os.listdir(model_dir)
+                  if v.startswith('v') and v[1:].isdigit()
+                  and (not complete or os.path.exists(os.path.join(model_dir, v, 'metadata.json'))))
+
+
+def _is_xgboost(model):
+    return type(model).__module__.startswith('xgboost')
+
+
+def save_model(model, name='kpi_degradation', features=None, training_data=None, metrics=None,
+               root=STORE_ROOT):
+    """Store ``model`` as the next version of ``name`` and return its version number."""
+    model_dir = os.path.join(root, name)
+    tmp_dir = os.path.join(model_dir, f'.tmp-{uuid.uuid4().hex}')
+    os.makedirs(tmp_dir)
+    try:
+        if _is_xgboost(model):
+            model.save_model(os.path.join(tmp_dir, XGB_FILE))
+            model_file = XGB_FILE
+        else:
+            import joblib
+            # No compression so that numpy arrays can be memory-mapped when loading
+            joblib.dump(model, os.path.join(tmp_dir, SKLEARN_FILE), compress=0)
+            model_file = SKLEARN_FILE
+
+        metadata = {
+            'name': name,
+            'version': None,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'estimator': f'{type(model).__module__}.{type(model).__name__}',
+            'model_file': model_file,
+            'features': list(features) if features is not None else None,
+            'training_data_hash': data_hash(training_data) if training_data is not None else None,
+            'metrics': metrics or {},
+        }
+        while True:
+            versions = _versions(model_dir, complete=False)
+            metadata['version'] = version = versions[-1] + 1 if versions else 1
+            with open(os.path.join(tmp_dir, 'metadata.json'), 'w') as f:
+                json.dump(metadata, f, indent=2, default=float)
+            try:
+                # rename() fails if another save already took this version number
+                os.rename(tmp_dir, os.path.join(model_dir, f'v{version:04d}'))
+                return version
+            except OSError:
+                if not os.path.isdir(os.path.join(model_dir, f'v{version:04d}')):
+                    raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_metadata(name='kpi_degradation', version=None, root=STORE_ROOT):
+    model_dir = os.path.join(root, name)
+    versions = _versions(model_dir)
+    if not versions:
+        raise FileNotFoundError(f"No stored versions of model '{name}' in {root}")
+    version = versions[-1] if version is None else int(version)
+    if version not in versions:
+        raise FileNotFoundError(f"Model '{name}' has no version {version}")
+    with open(os.path.join(model_dir, f'v{version:04d}', 'metadata.json')) as f:
+        return json.load(f)
+
+
+def load_model(name='kpi_degradation', version=None, root=STORE_ROOT, mmap=True):
+    """Load the latest (or a pinned) version of ``name``; returns ``(model, metadata)``."""
+    metadata = load_metadata(name, version, root)
+    path = os.path.join(root, name, f"v{metadata['version']:04d}", metadata['model_file'])
+
+    if metadata['model_file'] == XGB_FILE:
+        import xgboost
+        model = getattr(xgboost, metadata['estimator'].rsplit('.', 1)[1])()
+        model.load_model(path)
+    else:
+        import joblib
+        model = joblib.load(path, mmap_mode='r' if mmap else None)
+    return model, metadata
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Content-addressed stage cache for the generate -> ... -> explain pipeline.
+
+Every stage's cache key is a hash of its code, its parameters and the keys of the
+stages it depends on, so keys are known before anything runs. Requesting a stage
+loads its output from the cache when the key exists and only otherwise pulls its
+inputs (recursively) and runs it. Changing a Prophet parameter therefore reruns
+only ``forecast``; data generation and feature engineering come from the cache.
+
+A stage's code is its function plus every function and class of this directory
+it reaches, directly or through lazy imports (``code_dependencies()``), so editing
+a helper such as ``synthetic_data.business_kpi_chunk`` reruns the stages using it.
+
+    pipeline = default_pipeline(forecast_params={'seasonality_mode': 'additive'})
+    outputs = pipeline.run(['forecast', 'explain'])
+    print(pipeline.report())
+"""
+
+import os
+import json
+import time
+import pickle
+import inspect
+import hashlib
+import importlib
+from collections import namedtuple
+import pandas as pd
+import pipeline_stages as stages
+
+CACHE_DIR = '.pipeline_cache'
+# Functions and classes defined in modules of this directory are part of a stage's code
+CODE_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+Stage = namedtuple('Stage', ['name', 'fn', 'inputs', 'params', 'code_deps'])
+
+
+def stage(name, fn, inputs=(), params=None, code_deps=()):
+    """Declare a stage; ``code_deps`` lists extra callables the dependency scan cannot reach."""
+    return Stage(name, fn, tuple(inputs), dict(params or {}), tuple(code_deps))
+
+
+def _is_local(obj, root):
+    path = getattr(inspect.getmodule(obj), '__file__', None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == root
+
+
+def _code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def code_dependencies(functions, root=CODE_ROOT):
+    """Every local function and class reachable from ``functions``, in a stable order.
+
+    Names used in a function's code are looked up in its globals, in the local
+    modules those globals hold (``stages.generate_data``) and in local modules it
+    imports lazily (``from imbalance import rebalance``), then followed recursively.
+    """
+    found = {}
+    pending = list(functions)
+    while pending:
+        obj = pending.pop()
+        obj = getattr(obj, '__wrapped__', obj)
+        if inspect.isclass(obj):
+            key = f'{obj.__module__}.{obj.__qualname__}'
+            if key in found or not _is_local(obj, root):
+                continue
+            found[key] = obj
+            pending.extend(v for v in vars(obj).values() if inspect.isfunction(v))
+            continue
+        if not inspect.isfunction(obj):
+            continue
+        key = f'{obj.__module__}.{obj.__qualname__}'
+        if key in found or not _is_local(obj, root):
+            continue
+        found[key] = obj
+        names = _code_names(obj.__code__)
+        scopes = [obj.__globals__]
+        scopes += [vars(v) for v in obj.__globals__.values() if inspect.ismodule(v) and _is_local(v, root)]
+        scopes += [vars(importlib.import_module(n)) for n in sorted(names)
+                   if os.path.exists(os.path.join(root, f'{n}.py'))]
+        for name in names:
+            value = obj.__globals__.get(name)
+            if isinstance(value, (str, int, float, tuple, list, dict)):
+                # Module-level constants such as feature lists change results too
+                found[f'{obj.__module__}.{name}'] = value
+            for scope in scopes:
+                value = scope.get(name)
+                if inspect.isfunction(value) or inspect.isclass(value):
+                    pending.append(value)
+    return [found[key] for key in sorted(found)]
+
+
+def _code_hash(functions, root=CODE_ROOT):
+    digest = hashlib.sha256()
+    for obj in code_dependencies(functions, root):
+        if not (inspect.isfunction(obj) or inspect.isclass(obj)):
+            digest.update(repr(obj).encode())
+            continue
+        try:
+            digest.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            digest.update(obj.__code__.co_code)
+    return digest.hexdigest()
+
+
+class Pipeline:
+    def __init__(self, stages_, cache_dir=CACHE_DIR, code_root=CODE_ROOT):
+        self.stages = {s.name: s for s in stages_}
+        self.cache_dir = cache_dir
+        self.code_root = code_root
+        self.records = []
+        self._keys = {}
+        self._memo = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        for s in stages_:
+            missing = [i for i in s.inputs if i not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{s.name}' depends on unknown stages {missing}")
+
+    def key(self, name):
+        """Hash of the stage's code, parameters and upstream keys (Merkle-style)."""
+        if name not in self._keys:
+            s = self.stages[name]
+            payload = {
+                'name': name,
+                'code': _code_hash((s.fn,) + s.code_deps, self.code_root),
+                'params': s.params,
+                'inputs': [self.key(i) for i in s.inputs],
+            }
+            self._keys[name] = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        return self._keys[name]
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f'{name}-{self.key(name)[:20]}.pkl')
+
+    def get(self, name):
+        if name in self._memo:
+            return self._memo[name]
+        path = self._path(name)
+        start = time.perf_counter()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                output = pickle.load(f)
+            self.records.append({'stage': name, 'cache_hit': True, 'seconds': time.perf_counter() - start,
+                                 'key': self.key(name)[:12]})
+        else:
+            s = self.stages[name]
+            inputs = [self.get(i) for i in s.inputs]
+            start = time.perf_counter()
+            output = s.fn(*inputs, **s.params)
+            seconds = time.perf_counter() - start
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self.records.append({'stage': name, 'cache_hit': False, 'seconds': seconds, 'key': self.key(name)[:12]})
+        self._memo[name] = output
+        return output
+
+    def run(self, targets=None):
+        """Materialise ``targets`` (default: every stage) and return ``{name: output}``."""
+        targets = list(self.stages) if targets is None else list(targets)
+        return {name: self.get(name) for name in targets}
+
+    def report(self):
+        """Per-stage timing and cache-hit table for the stages touched so far."""
+        return pd.DataFrame(self.records, columns=['stage', 'cache_hit', 'seconds', 'key'])
+
+    def clear(self, keep_current=True):
+        """Delete cached outputs, keeping the ones for the current keys by default."""
+        current = {os.path.basename(self._path(name)) for name in self.stages} if keep_current else set()
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.pkl') and filename not in current:
+                os.remove(os.path.join(self.cache_dir, filename))
+
+
+def _generate(num_days, tx_per_interval, seed):
+    return stages.generate_data(num_days, tx_per_interval, seed=seed)
+
+
+def _clean(raw):
+    business_kpi_df, interval_kpi_df, it_metrics_df = raw
+    return stages.clean_business_kpi(business_kpi_df), interval_kpi_df, stages.clean_it_metrics(it_metrics_df)
+
+
+def _align(cleaned):
+    _, interval_kpi_df, it_metrics_df = cleaned
+    return stages.align_datasets(interval_kpi_df, it_metrics_df)
+
+
+def _forecast(daily_df, periods, **prophet_params):
+    from forecast_cache import fit_prophet
+
+    prophet_df = daily_df.rename(columns={'date': 'ds', 'transaction_success_rate': 'y'})
+    prophet_df['ds'] = pd.to_datetime(prophet_df['ds'])
+    return fit_prophet(prophet_df[['ds', 'y']], dict(prophet_params, periods=periods))
+
+
+def _explain(trained, features_df):
+    model, _ = trained
+    return stages.explain(model, features_df)
+
+
+def default_pipeline(num_days=30, tx_per_interval=20, seed=42, forecast_params=None, forecast_periods=30,
+                     cache_dir=CACHE_DIR):
+    """The notebook pipeline as a DAG of cached stages."""
+    forecast_params = {'seasonality_mode': 'multiplicative'} if forecast_params is None else forecast_params
+    return Pipeline([
+        stage('generate', _generate, params={'num_days': num_days, 'tx_per_interval': tx_per_interval, 'seed': seed}),
+        stage('clean', _clean, ['generate']),
+        stage('align', _align, ['clean']),
+        stage('features', stages.engineer_features, ['align']),
+        stage('aggregate', stages.daily_aggregates, ['features']),
+        stage('train', stages.train_degradation_model, ['features']),
+        stage('forecast', _forecast, ['aggregate'], dict(forecast_params, periods=forecast_periods)),
+        stage('explain', _explain, ['train', 'features']),
+    ], cache_dir=cache_dir)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the cached pipeline DAG.')
+    parser.add_argument('targets', nargs='*')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    pipeline = default_pipeline(num_days=args.days, seed=args.seed, cache_dir=args.cache_dir)
+    pipeline.run(args.targets or None)
+    print(pipeline.report().to_string(index=False))
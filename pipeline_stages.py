@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Importable versions of the notebook pipeline stages.
+
+``data_generation_and_preprocessing.py`` and ``model_building.py`` are Colab
+exports that run top to bottom on import. The functions below perform the same
+steps (generate, clean, align, feature-engineer, aggregate, train, explain) on
+DataFrames passed in, so they can be benchmarked, cached and called from scripts.
+"""
+
+import numpy as np
+import pandas as pd
+from synthetic_data import generate_chunks
+from interval_kpi import interval_kpis
+from incremental_features import FEATURES as KPI_FEATURES, add_row_features
+from schema import IT_METRIC_COLUMNS
+
+CLASSIFIER_FEATURES = IT_METRIC_COLUMNS
+TARGET = 'degradation_flag'
+
+
+def generate_data(num_days=30, tx_per_interval=20, num_services=1, seed=42):
+    """Raw ``(business_kpi_df, interval_kpi_df, it_metrics_df)`` like the notebook produces."""
+    chunks = list(generate_chunks(num_days, tx_per_interval, num_services, seed=seed))
+    business_kpi_df = pd.concat([b for b, _ in chunks], ignore_index=True)
+    it_metrics_df = pd.concat([m for _, m in chunks], ignore_index=True)
+    return business_kpi_df, interval_kpis(business_kpi_df), it_metrics_df
+
+
+def clean_business_kpi(df):
+    df = df.copy()
+    df['timestamp'] = df['timestamp'].ffill()
+    df['amount'] = df['amount'].fillna(df['amount'].median())
+    df['payment_status'] = df['payment_status'].fillna('Unknown')
+    return df.drop_duplicates()
+
+
+def clean_it_metrics(df):
+    # Metric timestamps are not forward-filled; the join counts and drops untimed samples
+    df = df.copy()
+    df['cpu_usage'] = df['cpu_usage'].fillna(df['cpu_usage'].mean())
+    df['memory_usage'] = df['memory_usage'].fillna(df['memory_usage'].mean())
+    df = df.drop_duplicates()
+
+    # Handling outliers (using interquartile range method)
+    q1 = df[IT_METRIC_COLUMNS].quantile(0.25)
+    q3 = df[IT_METRIC_COLUMNS].quantile(0.75)
+    iqr = q3 - q1
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+    for column in IT_METRIC_COLUMNS:
+        outlier = (df[column] < lower_bound[column]) | (df[column] > upper_bound[column])
+        df[column] = df[column].mask(outlier)
+        df[column] = df[column].fillna(df[column].mean())
+    return df
+
+
+def align_datasets(interval_kpi_df, it_metrics_df, tolerance=0):
+    """Outer join of interval KPIs with per-interval mean IT metrics (see ``streaming_join``)."""
+    from streaming_join import align_frames
+
+    return align_frames(interval_kpi_df, it_metrics_df, tolerance=tolerance)
+
+
+def add_lag_features(df, lag_features=KPI_FEATURES, lag=1):
+    for feature in lag_features:
+        df[f'{feature}_lag{lag}'] = df[feature].shift(lag)
+    return df
+
+
+def add_rolling_features(df, rolling_features=KPI_FEATURES, window=12):
+    for feature in rolling_features:
+        df[f'{feature}_rolling_mean'] = df[feature].rolling(window=window).mean()
+        df[f'{feature}_rolling_std'] = df[feature].rolling(window=window).std()
+    return df
+
+
+def engineer_features(aligned_df):
+    """Lag, rolling, interaction, time-based, encoding and anomaly-flag features."""
+    df = add_lag_features(aligned_df.copy())
+    df = add_rolling_features(df)
+    return add_row_features(df)
+
+
+def daily_aggregates(features_df):
+    return features_df.groupby(features_df['interval'].dt.date).agg({
+        column: 'mean' for column in KPI_FEATURES
+    }).reset_index().rename(columns={'interval': 'date'})
+
+
+def label_degradation(features_df):
+    """Drop incomplete rows and add the ``degradation_flag`` label (mean - 1 std threshold)."""
+    df = features_df.dropna(subset=['timestamp', 'cpu_usage', 'memory_usage'] + CLASSIFIER_FEATURES).copy()
+    threshold = df['transaction_success_rate'].mean() - df['transaction_success_rate'].std()
+    df[TARGET] = (df['transaction_success_rate'] < threshold).astype(int)
+    return df
+
+
+def train_degradation_model(features_df, random_state=42, imbalance='none'):
+    """XGBoost degradation classifier as in ``model_building.py``; returns ``(model, metrics)``.
+
+    ``imbalance`` selects an ``imbalance.rebalance`` method, applied to the training split only.
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score, recall_score
+    from xgboost import XGBClassifier
+    from imbalance import rebalance
+
+    df = label_degradation(features_df)
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[CLASSIFIER_FEATURES], df[TARGET], test_size=0.2, random_state=random_state)
+    X_train, y_train, params = rebalance(X_train, y_train, method=imbalance, random_state=random_state)
+    model = XGBClassifier(eval_metric='logloss', random_state=random_state, **params)
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    return model, {'accuracy': accuracy_score(y_test, y_pred), 'recall': recall_score(y_test, y_pred, zero_division=0)}
+
+
+def fit_arima(daily_df, order=(1, 0, 0), steps=30):
+    """ARIMA forecast of the daily success rate, as in the notebook's first model."""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    series = daily_df.set_index(pd.to_datetime(daily_df['date']))['transaction_success_rate'].asfreq('D').ffill()
+    return ARIMA(series, order=order).fit().forecast(steps=steps)
+
+
+def explain(model, features_df):
+    """Mean |SHAP| per classifier feature over ``features_df``."""
+    import shap
+
+    X = features_df[CLASSIFIER_FEATURES].dropna()
+    shap_values = np.asarray(shap.TreeExplainer(model).shap_values(X))
+    return pd.Series(np.abs(shap_values).mean(axis=0), index=CLASSIFIER_FEATURES)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Compact column types for every pipeline frame.
+
+The notebooks leave pandas to infer types: ``payment_status`` and
+``transaction_id`` are Python strings, flags are int64, metrics and features
+float64, and the feature CSV is read back without any dtypes. ``coerce()`` maps
+every known column to a compact type:
+
+- metrics, KPIs and derived features: float32;
+- flags, hour and day of week: int8;
+- ``payment_status``: a fixed categorical;
+- ``transaction_id``: int32 (``TX123456`` -> ``123456``);
+- ``interval``, ``timestamp`` and ``date``: datetime64[ns].
+
+It is applied where frames are loaded or saved: ``read_csv()`` below, the CSV
+writers of the notebook, ``synthetic_data`` and ``streaming_preprocessing``, and
+``feature_store.write_table`` / ``read_table``, whose Parquet schemas come from
+``arrow_schema()``. ``memory_report()`` compares the footprint of each stage's
+frame before and after coercion.
+"""
+
+import numpy as np
+import pandas as pd
+
+PAYMENT_STATUSES = ['Success', 'Failure', 'Unknown']
+PAYMENT_STATUS_DTYPE = pd.CategoricalDtype(PAYMENT_STATUSES)
+TRANSACTION_ID_PREFIX = 'TX'
+
+IT_METRIC_COLUMNS = ['cpu_usage', 'memory_usage', 'response_time', 'error_rate']
+
+DATETIME_COLUMNS = ['interval', 'timestamp', 'date']
+INT8_COLUMNS = ['hour', 'day_of_week', 'is_weekend', 'payment_status_encoded', 'high_error_rate_flag',
+                'response_time_spike_flag', 'degradation_flag']
+INT16_COLUMNS = ['service']
+# Metrics, KPIs and every lag / rolling feature derived from them start with one of these
+FLOAT32_PREFIXES = ('transaction_success_rate', 'total_transactions', 'amount', 'cpu_usage', 'memory_usage',
+                    'response_time', 'error_rate', 'cpu_memory_interaction')
+
+
+def encode_transaction_ids(ids):
+    """``TX123456`` -> ``123456`` as int32; numeric ids are passed through."""
+    ids = pd.Series(ids)
+    if pd.api.types.is_numeric_dtype(ids):
+        return ids.astype(np.int32)
+    return ids.astype(str).str.slice(len(TRANSACTION_ID_PREFIX)).astype(np.int32)
+
+
+def column_dtype(column, series=None):
+    """Compact dtype for ``column``, or ``None`` to leave it unchanged."""
+    if column in DATETIME_COLUMNS:
+        return 'datetime64[ns]'
+    if column in INT8_COLUMNS:
+        return np.int8
+    if column in INT16_COLUMNS:
+        return np.int16
+    if column == 'payment_status':
+        return PAYMENT_STATUS_DTYPE
+    if column == 'transaction_id':
+        return np.int32
+    if column.startswith(FLOAT32_PREFIXES):
+        return np.float32
+    if series is not None and pd.api.types.is_float_dtype(series):
+        return np.float32
+    return None
+
+
+def coerce(df):
+    """Copy of ``df`` with every known column converted to its compact dtype."""
+    out = {}
+    for column in df.columns:
+        series = df[column]
+        dtype = column_dtype(column, series)
+        if dtype is None or series.dtype == dtype:
+            out[column] = series
+        elif column == 'transaction_id':
+            out[column] = encode_transaction_ids(series).set_axis(series.index)
+        elif column == 'payment_status':
+            # Values outside the categories would silently become NaN and read as missing data
+            unknown = series.notna() & ~series.isin(PAYMENT_STATUSES)
+            if unknown.any():
+                examples = sorted(map(str, series[unknown].unique()[:5]))
+                raise ValueError(f"{int(unknown.sum())} payment_status values outside {PAYMENT_STATUSES}, "
+                                 f"e.g. {examples}")
+            out[column] = series.astype(dtype)
+        elif column in DATETIME_COLUMNS:
+            out[column] = pd.to_datetime(series).astype(dtype)
+        elif column in INT8_COLUMNS + INT16_COLUMNS and series.isna().any():
+            # Flags computed from missing values have no meaningful default; keep them nullable
+            out[column] = series.astype('Int8' if dtype is np.int8 else 'Int16')
+        else:
+            out[column] = series.astype(dtype)
+    return pd.DataFrame(out, index=df.index)
+
+
+def arrow_type(column):
+    """pyarrow type of ``column`` in the feature store, derived from ``column_dtype()``."""
+    import pyarrow as pa
+
+    dtype = column_dtype(column)
+    if dtype is None:
+        raise ValueError(f"No compact type defined for column {column!r}")
+    if column in DATETIME_COLUMNS:
+        return pa.timestamp('ns')
+    if column == 'payment_status':
+        return pa.dictionary(pa.int8(), pa.string())
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+
+def arrow_schema(columns):
+    """pyarrow schema with ``arrow_type()`` for each of ``columns``."""
+    import pyarrow as pa
+
+    return pa.schema([(column, arrow_type(column)) for column in columns])
+
+
+def read_csv(path, chunksize=None, **kwargs):
+    """``pd.read_csv`` with compact dtypes; yields coerced chunks when ``chunksize`` is set."""
+    header = pd.read_csv(path, nrows=0, usecols=kwargs.get('usecols')).columns
+    # Flags are parsed as float32 (they can be empty) and narrowed by coerce()
+    dtypes = {c: np.float32 for c in header if c.startswith(FLOAT32_PREFIXES) or c in INT8_COLUMNS + INT16_COLUMNS}
+    if 'payment_status' in header:
+        # Parsed as strings so coerce() can report values outside the categories
+        dtypes['payment_status'] = str
+    kwargs.setdefault('parse_dates', [c for c in header if c in DATETIME_COLUMNS])
+    if chunksize is None:
+        return coerce(pd.read_csv(path, dtype=dtypes, **kwargs))
+    return (coerce(chunk) for chunk in pd.read_csv(path, dtype=dtypes, chunksize=chunksize, **kwargs))
+
+
+def memory_report(frames):
+    """Deep memory use of each ``{stage: DataFrame}`` before and after ``coerce()``."""
+    rows = []
+    for stage, df in frames.items():
+        before = df.memory_usage(deep=True).sum()
+        after = coerce(df).memory_usage(deep=True).sum()
+        rows.append({
+            'stage': stage,
+            'rows': len(df),
+            'columns': df.shape[1],
+            'before_mb': before / 2 ** 20,
+            'after_mb': after / 2 ** 20,
+            'reduction_pct': 100 * (1 - after / before) if before else 0.0,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    import argparse
+    import pipeline_stages as stages
+
+    parser = argparse.ArgumentParser(description='Per-stage memory footprint with and without compact dtypes.')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--tx-per-interval', type=int, default=20)
+    args = parser.parse_args()
+
+    business_kpi_df, interval_kpi_df, it_metrics_df = stages.generate_data(args.days, args.tx_per_interval)
+    business_clean = stages.clean_business_kpi(business_kpi_df)
+    it_clean = stages.clean_it_metrics(it_metrics_df)
+    aligned_df = stages.align_datasets(interval_kpi_df, it_clean)
+    features_df = stages.engineer_features(aligned_df)
+    report = memory_report({
+        'raw_business_kpi': business_kpi_df,
+        'clean_business_kpi': business_clean,
+        'interval_kpi': interval_kpi_df,
+        'raw_it_metrics': it_metrics_df,
+        'clean_it_metrics': it_clean,
+        'aligned': aligned_df,
+        'features': features_df,
+        'daily': stages.daily_aggregates(features_df),
+    })
+    print(report.to_string(index=False, float_format='%.2f'))
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""Online scoring for the ``degradation_flag`` classifier.
+
+``DegradationScorer`` wraps a trained ``xgb_model`` / ``rf_model`` loaded once at
+startup and scores single rows or batches of the four IT metrics. ``MicroBatcher``
+groups concurrent single-row requests into one model call, and ``serve()`` exposes
+both over a small local HTTP API:
+
+    POST /predict   {"rows": [{"cpu_usage": ..., ...}, ...]}  or a single row object
+    GET  /metrics   request count and p50/p99 end-to-end latency in milliseconds
+    GET  /health
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import queue
+import numpy as np
+
+FEATURES = ['cpu_usage', 'memory_usage', 'response_time', 'error_rate']
+
+
+class LatencyTracker:
+    """Keeps the last ``size`` latencies and reports percentiles over them."""
+
+    def __init__(self, size=10000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.rows = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, rows=1):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.rows += rows
+
+    def summary(self):
+        with self.lock:
+            samples = np.fromiter(self.samples, dtype=np.float64)
+            count, rows = self.count, self.rows
+        if len(samples) == 0:
+            return {'requests': count, 'rows': rows, 'p50_ms': None, 'p99_ms': None}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {'requests': count, 'rows': rows, 'p50_ms': float(p50), 'p99_ms': float(p99),
+                'mean_row_us': float(samples.sum() / max(rows, 1) * 1e6)}
+
+
+class DegradationScorer:
+    def __init__(self, model, features=FEATURES):
+        self.model = model
+        self.features = list(features)
+        self.latency = LatencyTracker()
+        # XGBoost's inplace_predict skips DMatrix construction, which dominates small batches
+        self._booster = model.get_booster() if hasattr(model, 'get_booster') else None
+        self._iteration_range = None
+        if self._booster is not None:
+            try:
+                # Same trees as predict_proba, which stops at the early-stopping best iteration
+                self._iteration_range = (0, self._booster.best_iteration + 1)
+            except AttributeError:
+                pass
+
+    def to_matrix(self, rows):
+        """Feature matrix from a dict, a list of dicts, a DataFrame or an array-like."""
+        if isinstance(rows, dict):
+            rows = [rows]
+        if hasattr(rows, 'columns'):
+            return rows[self.features].to_numpy(dtype=np.float32)
+        if len(rows) and isinstance(rows[0], dict):
+            return np.array([[row[f] for f in self.features] for row in rows], dtype=np.float32)
+        matrix = np.asarray(rows, dtype=np.float32)
+        return matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+
+    def predict_matrix(self, matrix):
+        if self._booster is not None:
+            kwargs = {} if self._iteration_range is None else {'iteration_range': self._iteration_range}
+            probabilities = self._booster.inplace_predict(matrix, **kwargs)
+            return np.asarray(probabilities, dtype=np.float32).reshape(len(matrix), -1)[:, -1]
+        return self.model.predict_proba(matrix)[:, 1].astype(np.float32)
+
+    def predict_proba(self, rows):
+        """Degradation probability for every row."""
+        start = time.perf_counter()
+        matrix = self.to_matrix(rows)
+        probabilities = self.predict_matrix(matrix)
+        self.latency.record(time.perf_counter() - start, len(matrix))
+        return probabilities
+
+
+class MicroBatcher:
+    """Collects single-row requests for up to ``max_wait_ms`` and scores them together.
+
+    Latency is recorded per request, from ``submit()`` until its result is set, so
+    it includes the time spent waiting for the batch.
+    """
+
+    def __init__(self, scorer, max_batch=256, max_wait_ms=2.0):
+        self.scorer = scorer
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, row):
+        future = Future()
+        self.requests.put((self.scorer.to_matrix(row), future, time.perf_counter()))
+        return future
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            matrices, futures, enqueued = zip(*batch)
+            sizes = [len(m) for m in matrices]
+            try:
+                probabilities = self.scorer.predict_matrix(np.concatenate(matrices))
+            except Exception as exc:
+                for future in futures:
+                    future.set_exception(exc)
+                continue
+            for future, part, submitted in zip(futures, np.split(probabilities, np.cumsum(sizes)[:-1]), enqueued):
+                future.set_result(part)
+                self.scorer.latency.record(time.perf_counter() - submitted, len(part))
+
+
+def _handler(scorer, batcher, request_timeout=5.0):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send(200, scorer.latency.summary())
+            elif self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send(404, {'error': 'not found'})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                rows = payload.get('rows', payload) if isinstance(payload, dict) else payload
+                # Single rows go through the micro-batcher, explicit batches are scored directly
+                if isinstance(rows, dict):
+                    probabilities = batcher.predict(rows, timeout=request_timeout)
+                else:
+                    probabilities = scorer.predict_proba(rows)
+            except FutureTimeout:
+                self._send(503, {'error': 'scoring timed out, retry later'})
+                return
+            except (ValueError, KeyError, TypeError) as exc:
+                self._send(400, {'error': str(exc)})
+                return
+            self._send(200, {'probabilities': probabilities.tolist()})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+def serve(model, host='127.0.0.1', port=8000, features=FEATURES, max_batch=256, max_wait_ms=2.0,
+          request_timeout=5.0):
+    """Load ``model`` once and serve predictions until interrupted."""
+    scorer = DegradationScorer(model, features)
+    batcher = MicroBatcher(scorer, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    server = ThreadingHTTPServer((host, port), _handler(scorer, batcher, request_timeout))
+    print(f"Scoring service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    import argparse
+    from model_store import load_model
+
+    parser = argparse.ArgumentParser(description='Serve the degradation classifier over HTTP.')
+    parser.add_argument('--model', default='kpi_degradation')
+    parser.add_argument('--version', type=int, default=None)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    model, metadata = load_model(args.model, args.version)
+    serve(model, args.host, args.port, features=metadata['features'] or FEATURES)
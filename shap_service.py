@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""Parallel, time-budgeted SHAP explanations.
+
+``model_building.py`` runs ``shap.Explainer(model)`` over the whole ``X_test`` on
+one core. ``explain()`` splits the rows into shards, explains them on a process
+pool (each worker builds its ``TreeExplainer`` once), and returns float32 arrays.
+
+With ``time_budget`` set, a pilot shard measures the explanation rate first. If
+the full set cannot be explained in time, a stratified sample (by predicted
+class unless ``strata`` is given) is explained instead, and each row carries a
+weight so that ``global_importance()`` still estimates the mean |SHAP| of the
+full set. The predict used for the strata counts against the budget. Workers
+check the deadline between small chunks and return the rows explained so far;
+shards not yet started are cancelled, and the result is marked incomplete.
+
+SHAP interaction values are optional and limited to ``interaction_features``
+(the four IT metrics by default), since they cost one tree pass per feature pair.
+"""
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FutureTimeout
+import numpy as np
+import pandas as pd
+
+from schema import IT_METRIC_COLUMNS
+
+Explanation = namedtuple('Explanation', ['features', 'rows', 'values', 'weights', 'base_value',
+                                         'interactions', 'interaction_features', 'complete', 'seconds'])
+
+_worker = {}
+
+
+def _init_worker(model):
+    import shap
+    _worker['explainer'] = shap.TreeExplainer(model)
+
+
+def _positive_class(values, ndim):
+    # Binary classifiers return either a per-class list or an array with a trailing class axis
+    if isinstance(values, list):
+        values = values[-1]
+    values = np.asarray(values)
+    if values.ndim > ndim:
+        values = values[..., -1]
+    return values
+
+
+def _explain_shard(X, interaction_idx, deadline=None, chunk_rows=None):
+    """SHAP values for the leading rows of ``X`` explained before ``deadline`` (``time.time()``)."""
+    explainer = _worker['explainer']
+    step = chunk_rows or len(X)
+    values, interactions = [], []
+    for start in range(0, len(X), step):
+        # Checked between small chunks, so a worker stops soon after the budget runs out
+        if deadline is not None and time.time() >= deadline:
+            break
+        chunk = X[start:start + step]
+        values.append(_positive_class(explainer.shap_values(chunk), 2).astype(np.float32))
+        if interaction_idx is not None:
+            full = _positive_class(explainer.shap_interaction_values(chunk), 3)
+            interactions.append(full[:, interaction_idx][:, :, interaction_idx].astype(np.float32))
+    if not values:
+        k = len(interaction_idx or [])
+        return (np.empty((0, X.shape[1]), dtype=np.float32),
+                np.empty((0, k, k), dtype=np.float32) if interaction_idx is not None else None)
+    return np.concatenate(values), np.concatenate(interactions) if interactions else None
+
+
+def stratified_sample(strata, n, random_state=42):
+    """Row indices of a proportional stratified sample of size ~``n`` and their inverse-probability weights."""
+    rng = np.random.default_rng(random_state)
+    strata = np.asarray(strata)
+    keys, inverse, counts = np.unique(strata, return_inverse=True, return_counts=True)
+    # Proportional allocation, but at least one row from every stratum
+    take = np.maximum(np.round(counts * n / len(strata)).astype(int), 1)
+    take = np.minimum(take, counts)
+    rows, weights = [], []
+    for k in range(len(keys)):
+        members = np.flatnonzero(inverse == k)
+        chosen = rng.choice(members, take[k], replace=False)
+        rows.append(chosen)
+        weights.append(np.full(take[k], counts[k] / take[k], dtype=np.float32))
+    order = np.argsort(np.concatenate(rows))
+    return np.concatenate(rows)[order], np.concatenate(weights)[order]
+
+
+def explain(model, X, n_jobs=None, shard_size=2000, time_budget=None, strata=None, interactions=False,
+            interaction_features=IT_METRIC_COLUMNS, pilot_rows=200, random_state=42):
+    """SHAP values for the rows of ``X`` (a DataFrame) under an optional wall-clock budget in seconds."""
+    start = time.perf_counter()
+    features = list(X.columns)
+    values_in = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    n_jobs = n_jobs or os.cpu_count()
+    interaction_features = [f for f in interaction_features if f in features] if interactions else []
+    interaction_idx = [features.index(f) for f in interaction_features] or None
+
+    rows = np.arange(len(values_in))
+    weights = np.ones(len(rows), dtype=np.float32)
+    done_values, done_interactions, done_rows = [], [], []
+
+    _init_worker(model)
+    base_value = float(np.ravel(_worker['explainer'].expected_value)[-1])
+    deadline = None if time_budget is None else time.time() + time_budget - (time.perf_counter() - start)
+    chunk_rows = worker_deadline = pilot = None
+    if time_budget is not None and len(rows) > pilot_rows:
+        # Measure the rate on a pilot shard, then size the sample to fit the remaining budget
+        pilot = np.random.default_rng(random_state).choice(len(rows), pilot_rows, replace=False)
+        pilot_start = time.perf_counter()
+        pilot_result = _explain_shard(values_in[pilot], interaction_idx, deadline, max(pilot_rows // 4, 1))
+        pilot = pilot[:len(pilot_result[0])]
+        rate = max(len(pilot), 1) / (time.perf_counter() - pilot_start)
+
+        def capacity():
+            return int(rate * n_jobs * max(deadline - time.time(), 0) * 0.8)
+
+        if capacity() <= len(pilot):
+            # No time for more than the pilot: skip the predict and the pool
+            positions = np.empty(0, dtype=np.int64)
+        else:
+            if capacity() < len(rows):
+                if strata is None:
+                    strata = model.predict(X)
+                # Sized after the predict, so its time is charged to the budget as well
+                rows, weights = stratified_sample(strata, max(capacity(), pilot_rows), random_state)
+            # Small shards in random order, so whatever finishes before the deadline is a usable sample
+            positions = np.random.default_rng(random_state).permutation(len(rows))
+        shard_size = int(min(shard_size, max(rate * time_budget / 10, 50)))
+        # Shards check the deadline between chunks of ~2% of the budget; pool workers stop one
+        # chunk early so their partial results still arrive in time
+        chunk_rows = int(max(rate * time_budget / 50, 1))
+        worker_deadline = deadline - chunk_rows / rate
+    else:
+        positions = np.arange(len(rows))
+
+    shards = [positions[i:i + shard_size] for i in range(0, len(positions), shard_size)]
+    complete = True
+
+    def collect(shard, shard_values, shard_interactions):
+        # A shard cut short by the deadline returns its leading rows only
+        if len(shard_values):
+            done_rows.append(shard[:len(shard_values)])
+            done_values.append(shard_values)
+            if shard_interactions is not None:
+                done_interactions.append(shard_interactions)
+        return len(shard_values) == len(shard)
+
+    if n_jobs == 1 or len(shards) <= 1:
+        # No pool to start: explain in this process with the explainer built above
+        for shard in shards:
+            if not collect(shard, *_explain_shard(values_in[rows[shard]], interaction_idx, deadline, chunk_rows)):
+                complete = False
+                break
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(n_jobs, len(shards)), initializer=_init_worker,
+                                   initargs=(model,))
+        try:
+            futures = {pool.submit(_explain_shard, values_in[rows[shard]], interaction_idx, worker_deadline,
+                                   chunk_rows): shard for shard in shards}
+            timeout = None if deadline is None else max(deadline - time.time(), 0)
+            for future in as_completed(futures, timeout=timeout):
+                complete &= collect(futures[future], *future.result())
+        except FutureTimeout:
+            complete = False
+        finally:
+            # Queued shards are cancelled; running ones stop at their next deadline check
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    if not done_rows and pilot is not None and len(pilot):
+        # Nothing else finished in time: fall back to the pilot, itself a uniform random sample
+        rows, weights = pilot, np.full(len(pilot), len(values_in) / len(pilot), dtype=np.float32)
+        done_rows, done_values = [np.arange(len(pilot))], [pilot_result[0]]
+        done_interactions = [pilot_result[1]] if pilot_result[1] is not None else []
+
+    if done_rows:
+        done = np.concatenate(done_rows)
+        order = np.argsort(rows[done])
+        explained = rows[done][order]
+        values = np.concatenate(done_values)[order]
+        row_weights = weights[done][order]
+        interaction_values = np.concatenate(done_interactions)[order] if done_interactions else None
+    else:
+        explained = np.empty(0, dtype=np.int64)
+        values = np.empty((0, len(features)), dtype=np.float32)
+        row_weights = np.empty(0, dtype=np.float32)
+        interaction_values = None
+
+    return Explanation(features, explained, values, row_weights, base_value, interaction_values,
+                       interaction_features, complete and len(explained) == len(values_in),
+                       time.perf_counter() - start)
+
+
+def global_importance(explanation):
+    """Weighted mean |SHAP| per feature, in the ``Feature`` / ``SHAP Importance`` layout."""
+    weights = explanation.weights.astype(np.float64)
+    if len(weights):
+        importance = (np.abs(explanation.values) * weights[:, None]).sum(axis=0) / weights.sum()
+    else:
+        importance = np.zeros(len(explanation.features))
+    return pd.DataFrame({'Feature': explanation.features, 'SHAP Importance': importance}) \
+        .sort_values(by='SHAP Importance', ascending=False)
+
+
+def interaction_importance(explanation):
+    """Weighted mean |interaction value| between the ``interaction_features``."""
+    if explanation.interactions is None:
+        raise ValueError("Explanation was computed without interaction values")
+    weights = explanation.weights.astype(np.float64)
+    matrix = (np.abs(explanation.interactions) * weights[:, None, None]).sum(axis=0) / weights.sum()
+    return pd.DataFrame(matrix, index=explanation.interaction_features, columns=explanation.interaction_features)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Incremental, persisted SHAP value store.
+
+The dashboard used to run ``shap.TreeExplainer(model).shap_values(X)`` over the
+whole feature history on every page load. ``ShapStore`` explains only intervals
+it has not seen for the current model version and appends their attributions to
+flat float32 / int64 files that are read back with ``np.memmap``, so global,
+per-day and per-hour importances are served without recomputing anything.
+
+Each append writes the SHAP rows before their intervals, and opening a store
+truncates both files to the rows present in each, so a crash between the two
+writes cannot pair SHAP values with the wrong intervals.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+
+STORE_ROOT = 'shap_store'
+
+
+def model_fingerprint(model):
+    """Short content hash used as the model version when none is given."""
+    return hashlib.sha256(pickle.dumps(model)).hexdigest()[:16]
+
+
+def store_key(model_name, version):
+    """Store directory name for a registered model version, shared by every caller."""
+    return f'{model_name}-v{version}'
+
+
+def _positive_class(shap_values):
+    # Binary classifiers return either a per-class list or a (rows, features, classes) array
+    if isinstance(shap_values, list):
+        shap_values = shap_values[-1]
+    shap_values = np.asarray(shap_values)
+    if shap_values.ndim == 3:
+        shap_values = shap_values[..., -1]
+    return shap_values
+
+
+class ShapStore:
+    def __init__(self, features, model_version, root=STORE_ROOT):
+        self.features = list(features)
+        self.model_version = model_version
+        self.path = os.path.join(root, str(model_version))
+        self.values_path = os.path.join(self.path, 'values.f32')
+        self.intervals_path = os.path.join(self.path, 'intervals.i8')
+        self.meta_path = os.path.join(self.path, 'meta.json')
+        os.makedirs(self.path, exist_ok=True)
+        self._truncate_to_complete_rows()
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            if meta['features'] != self.features:
+                raise ValueError(f"SHAP store {self.path} was built for features {meta['features']}")
+
+    def _truncate_to_complete_rows(self):
+        row_bytes = (np.dtype(np.float32).itemsize * len(self.features), np.dtype(np.int64).itemsize)
+        paths = (self.values_path, self.intervals_path)
+        sizes = [os.path.getsize(p) if os.path.exists(p) else 0 for p in paths]
+        rows = min(size // width for size, width in zip(sizes, row_bytes))
+        for path, size, width in zip(paths, sizes, row_bytes):
+            if size > rows * width:
+                with open(path, 'r+b') as f:
+                    f.truncate(rows * width)
+
+    def __len__(self):
+        if not os.path.exists(self.intervals_path):
+            return 0
+        return os.path.getsize(self.intervals_path) // np.dtype(np.int64).itemsize
+
+    def intervals(self):
+        if len(self) == 0:
+            return np.empty(0, dtype='datetime64[ns]')
+        return np.memmap(self.intervals_path, dtype=np.int64, mode='r').view('datetime64[ns]')
+
+    def last_interval(self):
+        """Newest explained interval, or ``None`` for an empty store."""
+        intervals = self.intervals()
+        return pd.Timestamp(intervals.max()) if len(intervals) else None
+
+    def values(self):
+        """Memory-mapped ``(rows, features)`` float32 SHAP matrix."""
+        if len(self) == 0:
+            return np.empty((0, len(self.features)), dtype=np.float32)
+        return np.memmap(self.values_path, dtype=np.float32, mode='r', shape=(len(self), len(self.features)))
+
+    def missing(self, df, time_column='interval'):
+        """Rows of ``df`` whose interval has not been explained yet."""
+        intervals = pd.to_datetime(df[time_column]).to_numpy(dtype='datetime64[ns]')
+        return df[~np.isin(intervals, self.intervals())]
+
+    def append(self, intervals, shap_values):
+        shap_values = np.ascontiguousarray(shap_values, dtype=np.float32)
+        intervals = np.asarray(pd.to_datetime(intervals), dtype='datetime64[ns]').view(np.int64)
+        # Intervals go last: a row only counts once its interval is on disk
+        with open(self.values_path, 'ab') as f:
+            f.write(shap_values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.intervals_path, 'ab') as f:
+            f.write(intervals.tobytes())
+
+    def update(self, model, df, time_column='interval', explainer=None):
+        """Explain the rows of ``df`` that are not stored yet; returns how many were added."""
+        new_rows = self.missing(df.dropna(subset=[time_column]), time_column)
+        new_rows = new_rows.drop_duplicates(subset=[time_column])
+        if new_rows.empty:
+            return 0
+        if explainer is None:
+            import shap
+            explainer = shap.TreeExplainer(model)
+        shap_values = _positive_class(explainer.shap_values(new_rows[self.features]))
+        self.append(new_rows[time_column], shap_values)
+        with open(self.meta_path, 'w') as f:
+            json.dump({
+                'features': self.features,
+                'model_version': str(self.model_version),
+                'expected_value': np.ravel(explainer.expected_value).astype(float).tolist(),
+            }, f)
+        return len(new_rows)
+
+    def importance(self, by=None, start=None, end=None):
+        """Mean |SHAP| per feature, globally or per ``'day'`` / ``'hour'``.
+
+        Returns a DataFrame with a ``Feature`` / ``SHAP Importance`` layout for the
+        global case and one row per group (features as columns) otherwise.
+        """
+        intervals = pd.DatetimeIndex(self.intervals())
+        abs_values = np.abs(self.values())
+        if start is not None or end is not None:
+            mask = np.ones(len(intervals), dtype=bool)
+            if start is not None:
+                mask &= intervals >= pd.Timestamp(start)
+            if end is not None:
+                mask &= intervals < pd.Timestamp(end)
+            intervals, abs_values = intervals[mask], abs_values[mask]
+
+        if by is None:
+            return pd.DataFrame({
+                'Feature': self.features,
+                'SHAP Importance': abs_values.mean(axis=0) if len(abs_values) else np.zeros(len(self.features)),
+            }).sort_values(by='SHAP Importance', ascending=False)
+
+        if by == 'day':
+            keys = intervals.normalize()
+        elif by == 'hour':
+            keys = intervals.hour
+        else:
+            raise ValueError(f"Unsupported grouping: {by!r}")
+        grouped = pd.DataFrame(abs_values, columns=self.features).groupby(np.asarray(keys)).mean()
+        grouped.index.name = by
+        return grouped
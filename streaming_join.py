@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""Watermarked streaming join of interval KPIs and IT metric events.
+
+The notebook's ``align_datasets()`` averaged the whole IT metrics frame per
+interval and outer merged it with the whole interval KPI frame, after forward
+filling missing timestamps. ``StreamingJoin`` does the same join one chunk at a
+time: metric events are folded into per-interval sums and counts, KPI
+rows are buffered by interval, and an interval is emitted once both streams have
+moved ``allowed_lateness`` intervals past it (the watermark). Events for an
+interval that was already emitted are counted as late and dropped.
+
+A KPI interval with no metric events can take the most recent metric interval at
+most ``tolerance`` intervals older (an as-of match). Buffered state is capped at
+``max_open_intervals``; if one stream stalls, the oldest intervals are emitted
+anyway and counted in ``stats['forced_intervals']``.
+"""
+
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from interval_kpi import INTERVAL_FREQ
+from schema import IT_METRIC_COLUMNS
+
+KPI_VALUE_COLUMNS = ['transaction_success_rate', 'total_transactions']
+
+
+def _metric_sums(df, metrics):
+    # Per-interval sums and counts of each metric and of the timestamp offset into the interval
+    timestamp = pd.to_datetime(df['timestamp'])
+    interval = pd.to_datetime(df['interval']) if 'interval' in df else timestamp.dt.floor(INTERVAL_FREQ)
+    parts = {'interval': interval, 'events': np.ones(len(df))}
+    for metric in metrics:
+        values = df[metric].to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        parts[f'{metric}__sum'] = np.where(present, values, 0.0)
+        parts[f'{metric}__count'] = present.astype(np.float64)
+    # Nanosecond offsets are below 3e11, so float64 sums of them stay exact
+    offset = (timestamp - interval).to_numpy(dtype='timedelta64[ns]')
+    present = ~np.isnat(offset)
+    offset = offset.astype(np.int64).astype(np.float64)
+    parts['timestamp__sum'] = np.where(present, offset, 0.0)
+    parts['timestamp__count'] = present.astype(np.float64)
+    sums = pd.DataFrame(parts)
+    untimed = int(sums['interval'].isna().sum())
+    return sums.dropna(subset=['interval']).groupby('interval', sort=True).sum(), untimed
+
+
+def _metric_means(sums, metrics):
+    out = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offset = sums['timestamp__sum'] / sums['timestamp__count'].where(sums['timestamp__count'] > 0)
+        out['timestamp'] = pd.DatetimeIndex(sums.index).as_unit('ns') + pd.to_timedelta(np.round(offset.to_numpy()), unit='ns')
+        for metric in metrics:
+            count = sums[f'{metric}__count']
+            out[metric] = sums[f'{metric}__sum'] / count.where(count > 0)
+    means = pd.DataFrame(out, index=sums.index)
+    means.index.name = 'interval'
+    return means
+
+
+class StreamingJoin:
+    def __init__(self, allowed_lateness=1, tolerance=0, how='outer', max_open_intervals=288,
+                 metrics=IT_METRIC_COLUMNS):
+        if how not in ('outer', 'left'):
+            raise ValueError(f"Unsupported join type: {how!r}")
+        self.step = pd.Timedelta(INTERVAL_FREQ)
+        self.allowed_lateness = self.step * allowed_lateness
+        self.tolerance = self.step * tolerance
+        self.how = how
+        self.max_open_intervals = max_open_intervals
+        self.metrics = list(metrics)
+
+        self.kpis = pd.DataFrame(columns=KPI_VALUE_COLUMNS, dtype=np.float64,
+                                 index=pd.DatetimeIndex([], name='interval'))
+        self.sums = None
+        self.kpi_seen = None
+        self.metrics_seen = None
+        self.closed_before = None
+        # Last emitted metric intervals, kept only as far back as the as-of tolerance reaches
+        self.recent = deque()
+        self.stats = {
+            'kpi_rows': 0, 'metric_events': 0, 'late_kpi_rows': 0, 'late_metric_events': 0,
+            'untimed_metric_events': 0, 'emitted_rows': 0, 'asof_matches': 0, 'unmatched_kpi_rows': 0,
+            'forced_intervals': 0, 'peak_open_intervals': 0,
+        }
+
+    def _open_intervals(self):
+        index = self.kpis.index
+        if self.sums is not None:
+            index = index.union(self.sums.index)
+        return index
+
+    def update_kpis(self, df):
+        """Add interval KPI rows (``interval`` plus KPI columns); returns the rows this closed."""
+        rows = df[['interval'] + KPI_VALUE_COLUMNS].copy()
+        rows['interval'] = pd.to_datetime(rows['interval'])
+        rows = rows.dropna(subset=['interval']).set_index('interval')
+        self.stats['kpi_rows'] += len(rows)
+        if self.closed_before is not None:
+            late = rows.index < self.closed_before
+            self.stats['late_kpi_rows'] += int(late.sum())
+            rows = rows.loc[~late]
+        if not rows.empty:
+            self.kpis = pd.concat([self.kpis.loc[~self.kpis.index.isin(rows.index)], rows]) if len(self.kpis) else rows
+            self.kpis = self.kpis[~self.kpis.index.duplicated(keep='last')]
+            self.kpi_seen = max(self.kpi_seen, rows.index.max()) if self.kpi_seen is not None else rows.index.max()
+        return self._advance()
+
+    def update_metrics(self, df):
+        """Add raw IT metric events; returns the aligned rows this closed."""
+        sums, untimed = _metric_sums(df, self.metrics)
+        self.stats['metric_events'] += len(df)
+        self.stats['untimed_metric_events'] += untimed
+        if self.closed_before is not None:
+            late = sums.index < self.closed_before
+            self.stats['late_metric_events'] += int(sums.loc[late, 'events'].sum())
+            sums = sums.loc[~late]
+        if not sums.empty:
+            self.sums = sums if self.sums is None or self.sums.empty else self.sums.add(sums, fill_value=0)
+            latest = sums.index.max()
+            self.metrics_seen = max(self.metrics_seen, latest) if self.metrics_seen is not None else latest
+        return self._advance()
+
+    def _advance(self):
+        open_index = self._open_intervals()
+        self.stats['peak_open_intervals'] = max(self.stats['peak_open_intervals'], len(open_index))
+        watermark = None
+        if self.kpi_seen is not None and self.metrics_seen is not None:
+            watermark = min(self.kpi_seen, self.metrics_seen) - self.allowed_lateness
+        if len(open_index) > self.max_open_intervals:
+            # One stream is stalled: emit the oldest intervals to keep the state bounded
+            forced = open_index[len(open_index) - self.max_open_intervals]
+            if watermark is None or forced > watermark:
+                due = 0 if watermark is None else int((open_index < watermark).sum())
+                self.stats['forced_intervals'] += int((open_index < forced).sum()) - due
+                watermark = forced
+        if watermark is None:
+            return self._empty()
+        return self._emit(watermark)
+
+    def flush(self):
+        """Emit every buffered interval."""
+        open_index = self._open_intervals()
+        if not len(open_index):
+            return self._empty()
+        return self._emit(open_index.max() + self.step)
+
+    def _empty(self):
+        return pd.DataFrame(columns=['interval'] + KPI_VALUE_COLUMNS + ['timestamp'] + self.metrics)
+
+    def _emit(self, watermark):
+        kpi_mask = self.kpis.index < watermark
+        kpis, self.kpis = self.kpis.loc[kpi_mask], self.kpis.loc[~kpi_mask]
+        if self.sums is not None and not self.sums.empty:
+            metric_mask = self.sums.index < watermark
+            means, self.sums = _metric_means(self.sums.loc[metric_mask], self.metrics), self.sums.loc[~metric_mask]
+        else:
+            empty = pd.DataFrame(columns=['events', 'timestamp__sum', 'timestamp__count']
+                                 + [f'{m}__{s}' for m in self.metrics for s in ('sum', 'count')],
+                                 index=pd.DatetimeIndex([], name='interval'), dtype=np.float64)
+            means = _metric_means(empty, self.metrics)
+        self.closed_before = watermark if self.closed_before is None else max(self.closed_before, watermark)
+
+        aligned = kpis.join(means, how=self.how).sort_index()
+        if self.tolerance > pd.Timedelta(0):
+            aligned = self._asof_fill(aligned, kpis.index, means)
+        self.stats['unmatched_kpi_rows'] += int(aligned.loc[aligned.index.isin(kpis.index), self.metrics]
+                                                .isna().all(axis=1).sum())
+        self.stats['emitted_rows'] += len(aligned)
+        aligned.index.name = 'interval'
+        return aligned.reset_index()
+
+    def _asof_fill(self, aligned, kpi_index, means):
+        history = pd.concat([frame for frame in self.recent] + [means]) if self.recent else means
+        if not history.empty:
+            missing = aligned.index.isin(kpi_index) & aligned[self.metrics].isna().all(axis=1).to_numpy()
+            if missing.any():
+                lookup = pd.merge_asof(
+                    pd.DataFrame({'interval': aligned.index[missing]}),
+                    history.reset_index().sort_values('interval'),
+                    on='interval', direction='backward', tolerance=self.tolerance)
+                matched = lookup[self.metrics].notna().any(axis=1).to_numpy()
+                targets = aligned.index[missing][matched]
+                aligned.loc[targets, ['timestamp'] + self.metrics] = lookup.loc[matched, ['timestamp'] + self.metrics].to_numpy()
+                self.stats['asof_matches'] += int(matched.sum())
+        if not means.empty:
+            self.recent.append(means)
+            horizon = means.index.max() - self.tolerance
+            while self.recent and self.recent[0].index.max() < horizon:
+                self.recent.popleft()
+        return aligned
+
+
+def join_streams(kpi_chunks, metric_chunks, **kwargs):
+    """Sort-merge two time-ordered chunk iterators, feeding whichever stream is behind.
+
+    Yields aligned frames as intervals close; the final ``StreamingJoin`` is
+    returned by the generator (``StopIteration.value``) for its ``stats``.
+    """
+    join = StreamingJoin(**kwargs)
+    kpi_iter, metric_iter = iter(kpi_chunks), iter(metric_chunks)
+    kpi_next, metric_next = next(kpi_iter, None), next(metric_iter, None)
+    while kpi_next is not None or metric_next is not None:
+        feed_kpis = metric_next is None or (
+            kpi_next is not None and
+            pd.to_datetime(kpi_next['interval']).min() <= pd.to_datetime(metric_next['timestamp']).min())
+        if feed_kpis:
+            aligned, kpi_next = join.update_kpis(kpi_next), next(kpi_iter, None)
+        else:
+            aligned, metric_next = join.update_metrics(metric_next), next(metric_iter, None)
+        if not aligned.empty:
+            yield aligned
+    aligned = join.flush()
+    if not aligned.empty:
+        yield aligned
+    return join
+
+
+def align_frames(interval_kpi_df, it_metrics_df, tolerance=0, how='outer'):
+    """Batch call of the streaming join; with ``tolerance=0`` it equals the groupby + outer merge."""
+    join = StreamingJoin(tolerance=tolerance, how=how, max_open_intervals=np.iinfo(np.int64).max)
+    parts = [join.update_kpis(interval_kpi_df), join.update_metrics(it_metrics_df), join.flush()]
+    return pd.concat([part for part in parts if not part.empty], ignore_index=True)
+
+
+def align_csv(business_kpi_path, it_metrics_path, chunksize=500_000, **kwargs):
+    """Stream raw transactions and IT metrics from CSV into aligned interval rows."""
+    from interval_kpi import aggregate_csv
+    from schema import read_csv
+
+    kpi_chunks = aggregate_csv(business_kpi_path, chunksize=chunksize)
+    metric_chunks = read_csv(it_metrics_path, chunksize=chunksize)
+    return join_streams(kpi_chunks, metric_chunks, **kwargs)
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""Out-of-core version of the cleaning block in ``data_generation_and_preprocessing.py``.
+
+The notebook fills missing values with medians/means, drops duplicates and
+replaces IQR outliers on fully in-memory frames. Here the raw CSV/Parquet files
+are read in chunks twice:
+
+1. statistics pass -- running sums for the means, mergeable quantile sketches for
+   the median and the IQR bounds, and a one-bit-per-row keep mask for duplicates;
+2. cleaning pass -- fill, drop duplicates, clip outliers and append the result to
+   the output file chunk by chunk.
+
+As in the notebook, business timestamps are forward-filled and IT metric
+timestamps are not (the join drops untimed samples). Duplicates are whole rows
+after filling, like ``drop_duplicates()``, but are only detected within the
+deduplicator's window (see ``dedup``).
+
+Quantiles (and the mean of the values left after outlier removal) come from the
+sketch, so they are approximate; with the default ``k`` the relative rank error is
+well below 0.1%.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from dedup import make_deduplicator
+from schema import IT_METRIC_COLUMNS, coerce
+
+MEAN_FILL_COLUMNS = ['cpu_usage', 'memory_usage']
+
+
+class QuantileSketch:
+    """Mergeable multi-level compactor sketch (MRL/KLL family) for float values.
+
+    Level ``h`` holds items that each stand for ``2**h`` inputs. When a level grows
+    past ``k`` items it is sorted and every other item (random offset) is promoted,
+    so memory is ``O(k log(n / k))`` and ``merge()`` is just a level-wise concatenation.
+    """
+
+    def __init__(self, k=4096, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values, weight=1):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0 or weight <= 0:
+            return self
+        # A weight is spread over the levels given by its binary representation
+        level = 0
+        while weight:
+            if weight & 1:
+                self._append(level, values)
+            weight >>= 1
+            level += 1
+        self._compact()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            self._append(level, items, count=False)
+        self.count += other.count
+        self._compact()
+        return self
+
+    def _append(self, level, values, count=True):
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+        self.levels[level] = np.concatenate([self.levels[level], values])
+        if count:
+            self.count += values.size << level
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self.k:
+                items = np.sort(items)
+                keep = items.size if items.size % 2 == 0 else items.size - 1
+                promoted = items[self.rng.integers(2):keep:2]
+                self.levels[level] = items[keep:]
+                self._append(level + 1, promoted, count=False)
+            level += 1
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(l.size, 2.0 ** h) for h, l in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        items, weights = self._weighted()
+        if items.size == 0:
+            return np.nan
+        cumulative = np.cumsum(weights) - weights / 2
+        return float(np.interp(q * weights.sum(), cumulative, items))
+
+    def mean_between(self, lower, upper):
+        """Mean of the inputs inside ``[lower, upper]``, estimated from the sketch."""
+        items, weights = self._weighted()
+        inside = (items >= lower) & (items <= upper)
+        if not inside.any():
+            return np.nan
+        return float(np.average(items[inside], weights=weights[inside]))
+
+
+def read_chunks(path, chunksize=1_000_000, columns=None):
+    """Yield DataFrames from a CSV or Parquet file ``chunksize`` rows at a time."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns,
+                               parse_dates=['timestamp', 'interval'])
+
+
+class _ChunkWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet_writer = None
+        self.first = True
+
+    def write(self, df):
+        df = coerce(df)
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self.parquet_writer.write_table(table.cast(self.parquet_writer.schema))
+        else:
+            df.to_csv(self.path, mode='w' if self.first else 'a', header=self.first, index=False)
+        self.first = False
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+
+def _ffill_timestamp(df, last_timestamp):
+    # Forward-fill across chunk boundaries by seeding with the previous chunk's last value
+    timestamps = df['timestamp']
+    if last_timestamp is not None and pd.isna(timestamps.iloc[0]):
+        timestamps = timestamps.copy()
+        timestamps.iloc[0] = last_timestamp
+    df['timestamp'] = timestamps.ffill()
+    valid = df['timestamp'].dropna()
+    return valid.iloc[-1] if len(valid) else last_timestamp
+
+
+def clean_business_kpi(input_path, output_path, chunksize=1_000_000, dedup='window', dedup_options=None):
+    """Streaming equivalent of the business KPI missing-value and duplicate handling.
+
+    Duplicates are whole rows after filling, found by ``dedup.make_deduplicator(dedup)``.
+    """
+    amount_sketch = QuantileSketch()
+    for chunk in read_chunks(input_path, chunksize):
+        amount_sketch.update(chunk['amount'])
+    amount_median = amount_sketch.quantile(0.5)
+
+    deduplicator = make_deduplicator(dedup, None, **(dedup_options or {}))
+    writer, last_timestamp = _ChunkWriter(output_path), None
+    rows = 0
+    try:
+        for chunk in read_chunks(input_path, chunksize):
+            last_timestamp = _ffill_timestamp(chunk, last_timestamp)
+            chunk['amount'] = chunk['amount'].fillna(amount_median)
+            chunk['payment_status'] = chunk['payment_status'].fillna('Unknown')
+            chunk = chunk[deduplicator.keep(chunk)]
+            writer.write(chunk)
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return {'rows': rows, 'amount_median': amount_median, 'dedup': deduplicator.stats}
+
+
+def clean_it_metrics(input_path, output_path, chunksize=1_000_000, iqr_factor=1.5, dedup='window',
+                     dedup_options=None):
+    """Streaming equivalent of the IT metric missing-value, duplicate and outlier handling."""
+    sums = pd.Series(0.0, index=MEAN_FILL_COLUMNS)
+    counts = pd.Series(0, index=MEAN_FILL_COLUMNS)
+    missing_after_dedup = pd.Series(0, index=MEAN_FILL_COLUMNS)
+    sketches = {column: QuantileSketch() for column in IT_METRIC_COLUMNS}
+    deduplicator = make_deduplicator(dedup, None, **(dedup_options or {}))
+    keep_masks = []
+
+    # Pass 1: raw means, duplicate mask and sketches of the de-duplicated values
+    for chunk in read_chunks(input_path, chunksize):
+        sums += chunk[MEAN_FILL_COLUMNS].sum()
+        counts += chunk[MEAN_FILL_COLUMNS].count()
+        # Whole rows before the mean fill: rows that differ only by a missing vs a
+        # mean-valued metric would be duplicates after it, which continuous metrics never are
+        keep = deduplicator.keep(chunk)
+        keep_masks.append(np.packbits(keep))
+        kept = chunk[keep]
+        missing_after_dedup += kept[MEAN_FILL_COLUMNS].isna().sum()
+        for column in IT_METRIC_COLUMNS:
+            sketches[column].update(kept[column])
+    fill_means = sums / counts.replace(0, np.nan)
+
+    # Missing values are filled with the mean before the IQR step in the notebook
+    for column in MEAN_FILL_COLUMNS:
+        sketches[column].update([fill_means[column]], weight=int(missing_after_dedup[column]))
+    q1 = pd.Series({c: sketches[c].quantile(0.25) for c in IT_METRIC_COLUMNS})
+    q3 = pd.Series({c: sketches[c].quantile(0.75) for c in IT_METRIC_COLUMNS})
+    iqr = q3 - q1
+    lower_bound, upper_bound = q1 - iqr_factor * iqr, q3 + iqr_factor * iqr
+    outlier_fill = pd.Series({c: sketches[c].mean_between(lower_bound[c], upper_bound[c])
+                              for c in IT_METRIC_COLUMNS})
+
+    # Pass 2: fill, drop duplicates, replace outliers and write
+    writer, rows = _ChunkWriter(output_path), 0
+    try:
+        for chunk, packed in zip(read_chunks(input_path, chunksize), keep_masks):
+            chunk[MEAN_FILL_COLUMNS] = chunk[MEAN_FILL_COLUMNS].fillna(fill_means)
+            chunk = chunk[np.unpackbits(packed, count=len(chunk)).astype(bool)]
+            for column in IT_METRIC_COLUMNS:
+                values = chunk[column].to_numpy(dtype=np.float64)
+                outlier = (values < lower_bound[column]) | (values > upper_bound[column]) | np.isnan(values)
+                chunk[column] = np.where(outlier, outlier_fill[column], values)
+            writer.write(chunk)
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return {'rows': rows, 'lower_bound': lower_bound, 'upper_bound': upper_bound,
+            'fill_means': fill_means, 'outlier_fill': outlier_fill, 'dedup': deduplicator.stats}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Clean raw KPI and IT metric files in bounded memory.')
+    parser.add_argument('--input-dir', default='.')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--dedup', choices=['window', 'bloom'], default='window')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    business = clean_business_kpi(os.path.join(args.input_dir, 'raw_business_kpi_data.csv'),
+                                  os.path.join(args.output_dir, 'clean_business_kpi_data.csv'), args.chunksize,
+                                  dedup=args.dedup)
+    it_metrics = clean_it_metrics(os.path.join(args.input_dir, 'raw_it_metrics_data.csv'),
+                                  os.path.join(args.output_dir, 'clean_it_metrics_data.csv'), args.chunksize,
+                                  dedup=args.dedup)
+    print(f"Business KPI rows: {business['rows']}, IT metric rows: {it_metrics['rows']}")
+    print(f"Duplicates dropped: {business['dedup']['duplicates']} transactions, "
+          f"{it_metrics['dedup']['duplicates']} metric samples")
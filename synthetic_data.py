@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Vectorized synthetic data generator for business KPIs and IT metrics.
+
+Batched NumPy counterpart of ``generate_business_kpi_data()`` and
+``generate_it_metrics_data()`` in ``data_generation_and_preprocessing.py``.
+Rows are produced a block of intervals at a time and appended to disk, so
+the memory footprint depends on ``chunk_intervals`` rather than on the total
+number of rows.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from interval_kpi import IntervalKPIAggregator
+from schema import coerce
+
+INTERVAL_MINUTES = 5
+PAYMENT_STATUSES = np.array(['Success', 'Failure', None], dtype=object)
+PAYMENT_STATUS_WEIGHTS = [0.88, 0.1, 0.02]
+
+
+def interval_starts(num_days, end=None):
+    # Same 5-minute grid as the notebook, but in ascending order so chunks can be appended
+    end = pd.Timestamp.now() if end is None else pd.Timestamp(end)
+    periods = num_days * 24 * 60 // INTERVAL_MINUTES
+    return pd.date_range(end=end, periods=periods, freq=f'{INTERVAL_MINUTES}min')
+
+
+def _null_mask(rng, size, ratio):
+    return rng.random(size) < ratio
+
+
+def _duplicate(df, rng, ratio):
+    # Repeat a random subset of rows right after their original, like the notebook does
+    if ratio <= 0 or df.empty:
+        return df
+    repeats = 1 + (rng.random(len(df)) < ratio)
+    return df.loc[df.index.repeat(repeats)].reset_index(drop=True)
+
+
+def _timestamps(dates, rng, missing_ratio):
+    timestamps = pd.Series(dates)
+    timestamps[_null_mask(rng, len(timestamps), missing_ratio)] = pd.NaT
+    return timestamps
+
+
+def business_kpi_chunk(dates, rng, tx_per_interval=20, num_services=1,
+                       missing_ratio=0.5, status_missing_ratio=0.02, duplicate_ratio=0.01):
+    """Transactions for a block of intervals, same columns as ``generate_business_kpi_data()``."""
+    n = len(dates) * tx_per_interval
+    tx_dates = np.repeat(np.asarray(dates, dtype='datetime64[ns]'), tx_per_interval)
+
+    amount = np.round(rng.uniform(10, 500, n), 2)
+    amount[_null_mask(rng, n, missing_ratio)] = np.nan
+
+    weights = np.array(PAYMENT_STATUS_WEIGHTS, dtype=float)
+    weights[:2] *= (1 - status_missing_ratio) / weights[:2].sum()
+    weights[2] = status_missing_ratio
+    status = PAYMENT_STATUSES[rng.choice(len(PAYMENT_STATUSES), size=n, p=weights)]
+
+    df = pd.DataFrame({
+        'timestamp': _timestamps(tx_dates, rng, missing_ratio),
+        'transaction_id': np.char.add('TX', rng.integers(100000, 1000000, n).astype(str)),
+        'amount': amount,
+        'payment_status': status,
+    })
+    if num_services > 1:
+        df['service'] = rng.integers(0, num_services, n).astype(np.int32)
+    df = _duplicate(df, rng, duplicate_ratio)
+    df['interval'] = df['timestamp'].dt.floor(f'{INTERVAL_MINUTES}min')
+    return df
+
+
+def it_metrics_chunk(dates, rng, num_services=1, missing_ratio=0.5, duplicate_ratio=0.01):
+    """One metric sample per service and interval, same columns as ``generate_it_metrics_data()``."""
+    n = len(dates) * num_services
+    sample_dates = np.repeat(np.asarray(dates, dtype='datetime64[ns]'), num_services)
+
+    cpu_usage = np.round(rng.uniform(10, 90, n), 2)
+    cpu_usage[_null_mask(rng, n, missing_ratio)] = np.nan
+    memory_usage = np.round(rng.uniform(100, 1000, n), 2)
+    memory_usage[_null_mask(rng, n, missing_ratio)] = np.nan
+
+    df = pd.DataFrame({
+        'timestamp': _timestamps(sample_dates, rng, missing_ratio),
+        'cpu_usage': cpu_usage,
+        'memory_usage': memory_usage,
+        'response_time': np.round(rng.uniform(0.1, 5.0, n), 2),
+        'error_rate': np.round(rng.uniform(0, 0.2, n), 2),
+    })
+    if num_services > 1:
+        df['service'] = np.tile(np.arange(num_services, dtype=np.int32), len(dates))
+    df = _duplicate(df, rng, duplicate_ratio)
+    df['interval'] = df['timestamp'].dt.floor(f'{INTERVAL_MINUTES}min')
+    return df
+
+
+def generate_chunks(num_days=30, tx_per_interval=20, num_services=1, missing_ratio=0.5,
+                    status_missing_ratio=0.02, duplicate_ratio=0.01, seed=42,
+                    chunk_intervals=2016, end=None):
+    """Yield ``(business_kpi_df, it_metrics_df)`` pairs, one per block of ``chunk_intervals`` intervals."""
+    rng = np.random.default_rng(seed)
+    dates = interval_starts(num_days, end=end)
+    for start in range(0, len(dates), chunk_intervals):
+        block = dates[start:start + chunk_intervals]
+        business_df = business_kpi_chunk(block, rng, tx_per_interval, num_services,
+                                         missing_ratio, status_missing_ratio, duplicate_ratio)
+        it_df = it_metrics_chunk(block, rng, num_services, missing_ratio, duplicate_ratio)
+        yield business_df, it_df
+
+
+def write_synthetic_dataset(output_dir='.', num_days=30, tx_per_interval=20, num_services=1,
+                            missing_ratio=0.5, status_missing_ratio=0.02, duplicate_ratio=0.01,
+                            seed=42, chunk_intervals=2016):
+    """Generate the raw datasets chunk by chunk and append them to CSV files in ``output_dir``.
+
+    Returns the number of business and IT metric rows written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    business_path = os.path.join(output_dir, 'raw_business_kpi_data.csv')
+    it_path = os.path.join(output_dir, 'raw_it_metrics_data.csv')
+    interval_path = os.path.join(output_dir, 'raw_interval_business_kpi_data.csv')
+    aggregator = IntervalKPIAggregator()
+
+    business_rows = it_rows = 0
+    chunks = generate_chunks(num_days, tx_per_interval, num_services, missing_ratio,
+                             status_missing_ratio, duplicate_ratio, seed, chunk_intervals)
+    for i, (business_df, it_df) in enumerate(chunks):
+        mode, header = ('w', True) if i == 0 else ('a', False)
+        coerce(business_df).to_csv(business_path, mode=mode, header=header, index=False)
+        coerce(it_df).to_csv(it_path, mode=mode, header=header, index=False)
+        coerce(aggregator.update(business_df)).to_csv(interval_path, mode=mode, header=header, index=False)
+        business_rows += len(business_df)
+        it_rows += len(it_df)
+    coerce(aggregator.flush()).to_csv(interval_path, mode='a', header=business_rows == 0, index=False)
+    return business_rows, it_rows
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate synthetic business KPI and IT metric data.')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--tx-per-interval', type=int, default=20)
+    parser.add_argument('--services', type=int, default=1)
+    parser.add_argument('--missing-ratio', type=float, default=0.5)
+    parser.add_argument('--status-missing-ratio', type=float, default=0.02)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-intervals', type=int, default=2016)
+    args = parser.parse_args()
+
+    rows = write_synthetic_dataset(args.output_dir, args.days, args.tx_per_interval, args.services,
+                                   args.missing_ratio, args.status_missing_ratio, args.duplicate_ratio,
+                                   seed=args.seed, chunk_intervals=args.chunk_intervals)
+    print(f"Business KPI rows: {rows[0]}, IT metric rows: {rows[1]}")
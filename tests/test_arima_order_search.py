@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from arima_order_search import DEFAULT_ORDER, select_orders
+
+
+def _fake_search(name, values, search_params, warm_start):
+    # Picklable stand-in for auto_arima: the order encodes the series length
+    if name == 'broken':
+        raise ValueError('LU decomposition error')
+    return name, [len(values) % 3, 0, 1], [0, 0, 0, search_params['m']], 0.01
+
+
+def _series(n):
+    return {'a': np.arange(n, dtype=float), 'b': np.sin(np.arange(n, dtype=float))}
+
+
+def test_orders_are_cached_and_reused(tmp_path):
+    cache_path = str(tmp_path / 'orders.json')
+    orders, report = select_orders(_series(30), n_jobs=1, cache_path=cache_path, search_fn=_fake_search)
+    assert orders['a'] == ((0, 0, 1), (0, 0, 0, 7))
+    assert not report['cache_hit'].any()
+
+    again, report = select_orders(_series(30), n_jobs=1, cache_path=cache_path, search_fn=_fake_search)
+    assert again == orders
+    assert report['cache_hit'].all()
+
+    # New data for the same names is searched again, warm-started from the last orders
+    _, report = select_orders(_series(31), n_jobs=1, cache_path=cache_path, search_fn=_fake_search)
+    assert not report['cache_hit'].any()
+    assert report['warm_start'].all()
+
+
+def test_failed_search_falls_back_and_keeps_the_others(tmp_path):
+    cache_path = str(tmp_path / 'orders.json')
+    series = dict(_series(30), broken=np.ones(30))
+    orders, report = select_orders(series, n_jobs=1, cache_path=cache_path, search_fn=_fake_search)
+
+    assert orders['broken'] == DEFAULT_ORDER
+    errors = report.set_index('series')['error']
+    assert 'LU decomposition error' in errors['broken']
+    assert pd.isna(errors['a']) and pd.isna(errors['b'])
+    with open(cache_path) as f:
+        cache = json.load(f)
+    assert len(cache['orders']) == 2
+    assert set(cache['latest']) == {'a', 'b'}
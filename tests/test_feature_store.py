@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from feature_store import partitions, read_table, write_table
+from schema import coerce
+
+
+def _metrics(start, n, seed=0):
+    rng = np.random.default_rng(seed)
+    interval = pd.date_range(start, periods=n, freq='5min')
+    return pd.DataFrame({
+        'timestamp': interval + pd.Timedelta(seconds=30),
+        'cpu_usage': rng.uniform(10, 90, n),
+        'memory_usage': rng.uniform(100, 1000, n),
+        'response_time': rng.uniform(0.1, 5.0, n),
+        'error_rate': rng.uniform(0, 0.2, n),
+        'interval': interval,
+    })
+
+
+def test_round_trip_with_projection_and_time_range(tmp_path):
+    root = str(tmp_path)
+    df = _metrics('2024-01-01 23:00', 48)          # spans two days
+    write_table(df, 'it_metrics', root=root)
+    assert partitions('it_metrics', root) == ['2024-01-01', '2024-01-02']
+
+    stored = read_table('it_metrics', root=root)
+    assert stored['cpu_usage'].dtype == np.float32
+    pd.testing.assert_frame_equal(stored[df.columns], coerce(df))
+
+    window = read_table('it_metrics', columns=['interval', 'error_rate'], start='2024-01-02 00:30',
+                        end='2024-01-02 01:00', root=root)
+    assert list(window.columns) == ['interval', 'error_rate']
+    assert list(window['interval']) == list(pd.date_range('2024-01-02 00:30', periods=6, freq='5min'))
+
+
+def test_overwrite_replaces_only_touched_partitions(tmp_path):
+    root = str(tmp_path)
+    write_table(_metrics('2024-01-01', 2 * 288), 'it_metrics', root=root)
+    # Rewriting the second day leaves the first one alone
+    write_table(_metrics('2024-01-02', 10, seed=1), 'it_metrics', root=root)
+    stored = read_table('it_metrics', root=root)
+    assert len(stored) == 288 + 10
+
+    write_table(_metrics('2024-01-02 01:00', 5, seed=2), 'it_metrics', root=root, mode='append')
+    assert len(read_table('it_metrics', start='2024-01-02', root=root)) == 15
+
+
+def test_rows_without_time_are_kept_out_of_ranged_reads(tmp_path):
+    root = str(tmp_path)
+    df = _metrics('2024-01-01', 4)
+    df.loc[2, 'interval'] = pd.NaT
+    write_table(df, 'it_metrics', root=root)
+    assert len(read_table('it_metrics', root=root)) == 4
+    assert len(read_table('it_metrics', start='2024-01-01', root=root)) == 3
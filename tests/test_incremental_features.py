@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from incremental_features import FEATURES, append_features
+
+
+def _intervals(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'interval': pd.date_range('2024-01-01', periods=n, freq='5min')})
+    for feature in FEATURES:
+        df[feature] = rng.uniform(0, 100, n).round(2)
+    return df
+
+
+def _append_in_parts(df, directory, parts, damage=None):
+    output_path, state_path = str(directory / 'features.csv'), str(directory / 'state.npz')
+    for i, part in enumerate(np.array_split(np.arange(len(df)), parts)):
+        append_features(df.iloc[part], output_path, state_path)
+        if damage is not None and i == 0:
+            damage(output_path, state_path)
+    return pd.read_csv(output_path)
+
+
+def test_chunked_appends_match_one_append(tmp_path):
+    df = _intervals(60)
+    (tmp_path / 'one').mkdir()
+    (tmp_path / 'many').mkdir()
+    pd.testing.assert_frame_equal(_append_in_parts(df, tmp_path / 'many', 5),
+                                  _append_in_parts(df, tmp_path / 'one', 1))
+
+
+def test_appended_rows_are_float32(tmp_path):
+    _append_in_parts(_intervals(20), tmp_path, 2)
+    # float32 values are written with float32 precision, float64 ones with up to 17 digits
+    values = pd.read_csv(tmp_path / 'features.csv', dtype=str)['transaction_success_rate_rolling_mean'].dropna()
+    assert len(values) == 9
+    assert all(value == str(np.float32(value)) for value in values)
+
+
+def test_interrupted_append_is_truncated(tmp_path):
+    def half_written_row(output_path, _):
+        with open(output_path, 'a') as f:
+            f.write('2024-01-01 09:00:00,12.5,')
+
+    df = _intervals(40)
+    (tmp_path / 'clean').mkdir()
+    (tmp_path / 'crashed').mkdir()
+    pd.testing.assert_frame_equal(_append_in_parts(df, tmp_path / 'crashed', 4, half_written_row),
+                                  _append_in_parts(df, tmp_path / 'clean', 4))
+
+
+def test_lost_state_is_rebuilt_from_the_csv(tmp_path):
+    def drop_state(_, state_path):
+        os.remove(state_path)
+        os.remove(f'{state_path}.json')
+
+    df = _intervals(40)
+    (tmp_path / 'clean').mkdir()
+    (tmp_path / 'lost').mkdir()
+    pd.testing.assert_frame_equal(_append_in_parts(df, tmp_path / 'lost', 4, drop_state),
+                                  _append_in_parts(df, tmp_path / 'clean', 4))
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from interval_kpi import IntervalKPIAggregator, interval_kpis
+
+
+def _transactions(*minutes):
+    start = pd.Timestamp('2024-01-01')
+    return pd.DataFrame({
+        'timestamp': [start + pd.Timedelta(minutes=m) for m in minutes],
+        'payment_status': ['Success'] * len(minutes),
+    })
+
+
+def test_interval_closes_exactly_allowed_lateness_intervals_later():
+    aggregator = IntervalKPIAggregator(allowed_lateness=2)
+    assert aggregator.update(_transactions(0)).empty
+    # One newer interval is not enough with allowed_lateness=2
+    assert aggregator.update(_transactions(5)).empty
+    closed = aggregator.update(_transactions(10))
+    assert list(closed['interval']) == [pd.Timestamp('2024-01-01 00:00')]
+
+    # The closed interval no longer accepts rows, the next one still does
+    assert aggregator.update(_transactions(1, 6)).empty
+    assert aggregator.late_rows == 1
+
+
+def test_streaming_matches_batch():
+    df = _transactions(*range(0, 60, 2))
+    aggregator = IntervalKPIAggregator(allowed_lateness=1)
+    parts = [aggregator.update(df.iloc[i:i + 7]) for i in range(0, len(df), 7)] + [aggregator.flush()]
+    streamed = pd.concat(parts, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, interval_kpis(df))
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from intraday_forecast import IntradayForecaster, to_grid
+
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    interval = pd.date_range('2024-01-01', periods=n, freq='5min')
+    steps = np.arange(n)
+    df = pd.DataFrame({
+        'interval': interval,
+        'transaction_success_rate': 90 + 5 * np.sin(2 * np.pi * steps / 288) + rng.normal(0, 1, n),
+        'response_time': rng.uniform(0.1, 5.0, n),
+        'error_rate': rng.uniform(0, 0.2, n),
+    })
+    # Missing values and whole missing intervals
+    df.loc[rng.random(n) < 0.2, 'response_time'] = np.nan
+    return df.drop(index=rng.choice(np.arange(10, n), 30, replace=False))
+
+
+def test_update_matches_fit_across_gaps():
+    df = _frame(1200)
+    grid = to_grid(df)
+    split = 600
+    incremental = IntradayForecaster(window=2000).fit(grid.iloc[:split])
+    incremental.update_frame(grid.iloc[split:].dropna(how='all').reset_index())
+    batch = IntradayForecaster(window=2000).fit(grid)
+
+    np.testing.assert_allclose(incremental.XtX, batch.XtX, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(incremental.Xty, batch.Xty, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(incremental.history, batch.history)
+
+
+def test_intervals_are_calibrated_for_uniform_noise():
+    model = IntradayForecaster(window=1200).fit(_frame(1200))
+    # Normal intervals would use 1.96; a uniform's 95% quantile is 1.645 standard deviations
+    assert 1.5 < model.z[2] < 1.8
+    assert 1.5 < model.z[1] < 1.8
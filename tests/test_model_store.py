@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+
+from model_store import load_metadata, load_model, save_model
+
+FEATURES = ['cpu_usage', 'memory_usage']
+
+
+def _training_data(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 2)), columns=FEATURES)
+    return X, (X['cpu_usage'] + 0.1 * rng.normal(size=n) > 0).astype(int)
+
+
+def test_round_trip_keeps_predictions_and_metadata(tmp_path):
+    X, y = _training_data()
+    root = str(tmp_path)
+    xgb = XGBClassifier(n_estimators=5, max_depth=2).fit(X, y)
+    linear = LogisticRegression().fit(X, y)
+    assert save_model(xgb, 'm', FEATURES, X, {'recall': 0.9}, root=root) == 1
+    assert save_model(linear, 'm', FEATURES, X, root=root) == 2
+
+    latest, metadata = load_model('m', root=root)
+    assert metadata['version'] == 2 and metadata['features'] == FEATURES
+    np.testing.assert_allclose(latest.predict_proba(X), linear.predict_proba(X))
+    pinned, metadata = load_model('m', version=1, root=root)
+    assert metadata['metrics'] == {'recall': 0.9}
+    np.testing.assert_allclose(pinned.predict_proba(X), xgb.predict_proba(X), rtol=1e-6)
+
+
+def test_incomplete_version_is_ignored(tmp_path):
+    X, y = _training_data()
+    root = str(tmp_path)
+    save_model(LogisticRegression().fit(X, y), 'm', FEATURES, root=root)
+    # A save that crashed after creating its directory, before writing metadata.json
+    os.makedirs(tmp_path / 'm' / 'v0002')
+    (tmp_path / 'm' / 'v0002' / 'model.joblib').write_bytes(b'partial')
+
+    assert load_metadata('m', root=root)['version'] == 1
+    _, metadata = load_model('m', root=root)
+    assert metadata['version'] == 1
+
+    # The next save skips the broken number instead of writing into it
+    assert save_model(LogisticRegression().fit(X, y), 'm', FEATURES, root=root) == 3
+    assert load_metadata('m', root=root)['version'] == 3
+    assert sorted(os.listdir(tmp_path / 'm')) == ['v0001', 'v0002', 'v0003']
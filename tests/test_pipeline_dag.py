@@ -0,0 +1,58 @@
+import sys
+import importlib
+import textwrap
+
+import pipeline_dag
+import pipeline_stages as stages
+from pipeline_dag import Pipeline, stage, code_dependencies
+
+
+def _write_modules(root, factor):
+    (root / 'dag_helper.py').write_text(textwrap.dedent(f'''
+        def scale(x):
+            return x * {factor}
+    '''))
+    (root / 'dag_stage.py').write_text(textwrap.dedent('''
+        def produce(x):
+            from dag_helper import scale
+            return scale(x)
+    '''))
+
+
+def _run(root, cache_dir):
+    for name in ('dag_helper', 'dag_stage'):
+        sys.modules.pop(name, None)
+    importlib.invalidate_caches()
+    import dag_stage
+    pipeline = Pipeline([stage('produce', dag_stage.produce, params={'x': 2})], cache_dir=str(cache_dir),
+                        code_root=str(root))
+    output = pipeline.run()['produce']
+    return output, bool(pipeline.report()['cache_hit'].iloc[0])
+
+
+def test_editing_a_lazily_imported_helper_reruns_the_stage(tmp_path, monkeypatch):
+    code_root, cache_dir = tmp_path / 'code', tmp_path / 'cache'
+    code_root.mkdir()
+    monkeypatch.syspath_prepend(str(code_root))
+
+    _write_modules(code_root, 3)
+    assert _run(code_root, cache_dir) == (6, False)
+    assert _run(code_root, cache_dir) == (6, True)
+
+    # A different length as well, so linecache cannot serve the old source on a coarse mtime
+    _write_modules(code_root, 50)
+    assert _run(code_root, cache_dir) == (100, False)
+
+
+def test_default_stages_reach_helper_modules(tmp_path):
+    pipeline = pipeline_dag.default_pipeline(cache_dir=str(tmp_path))
+
+    def names(stage_name):
+        deps = code_dependencies([pipeline.stages[stage_name].fn])
+        return {f'{d.__module__}.{d.__qualname__}' for d in deps if hasattr(d, '__qualname__')}
+
+    assert {'synthetic_data.generate_chunks', 'synthetic_data.business_kpi_chunk',
+            'interval_kpi.interval_kpis'} <= names('generate')
+    assert 'incremental_features.add_row_features' in names('features')
+    assert 'imbalance.rebalance' in names('train')
+    assert stages.label_degradation in code_dependencies([stages.train_degradation_model])
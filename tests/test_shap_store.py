@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from shap_store import ShapStore, store_key
+
+FEATURES = ['cpu_usage', 'memory_usage']
+
+
+class _Explainer:
+    """Deterministic stand-in for shap.TreeExplainer: SHAP value = feature value."""
+    expected_value = 0.5
+
+    def shap_values(self, X):
+        return X.to_numpy(dtype=np.float32)
+
+
+def _features(start, n):
+    return pd.DataFrame({
+        'interval': pd.date_range(start, periods=n, freq='5min'),
+        'cpu_usage': np.arange(n, dtype=float),
+        'memory_usage': np.arange(n, dtype=float) * 10,
+    })
+
+
+def test_round_trip_only_explains_new_intervals(tmp_path):
+    key = store_key('kpi_degradation', 3)
+    store = ShapStore(FEATURES, key, root=str(tmp_path))
+    assert store.update(None, _features('2024-01-01', 5), explainer=_Explainer()) == 5
+
+    reopened = ShapStore(FEATURES, key, root=str(tmp_path))
+    assert reopened.update(None, _features('2024-01-01', 8), explainer=_Explainer()) == 3
+    assert len(reopened) == 8
+    assert reopened.last_interval() == pd.Timestamp('2024-01-01 00:35')
+    np.testing.assert_array_equal(reopened.values()[5:, 0], [5, 6, 7])
+    importance = reopened.importance().set_index('Feature')['SHAP Importance']
+    assert importance['memory_usage'] > importance['cpu_usage']
+
+
+def test_crash_between_values_and_intervals_is_truncated(tmp_path):
+    store = ShapStore(FEATURES, store_key('kpi_degradation', 1), root=str(tmp_path))
+    store.update(None, _features('2024-01-01', 4), explainer=_Explainer())
+    # Values of two more rows (and half of a third) written, their intervals never
+    with open(store.values_path, 'ab') as f:
+        f.write(np.ones(5, dtype=np.float32).tobytes())
+
+    reopened = ShapStore(FEATURES, store_key('kpi_degradation', 1), root=str(tmp_path))
+    assert len(reopened) == 4
+    assert os.path.getsize(reopened.values_path) == 4 * len(FEATURES) * 4
+    assert reopened.update(None, _features('2024-01-01 00:20', 2), explainer=_Explainer()) == 2
+    np.testing.assert_array_equal(reopened.intervals(),
+                                  pd.date_range('2024-01-01', periods=6, freq='5min').to_numpy(dtype='datetime64[ns]'))
+    np.testing.assert_array_equal(reopened.values()[4:], [[0, 0], [1, 10]])
+
+
+def test_store_key_separates_models():
+    assert store_key('a', 1) != store_key('b', 1)